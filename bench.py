@@ -0,0 +1,115 @@
+import argparse
+import contextlib
+import json
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+import torch
+from torch.optim import AdamW
+from transformers import AutoModelForSequenceClassification
+
+from index import (DATA_FILE, DEDUP_THRESHOLD, MAX_LENGTH, MODEL_NAME, device, evaluate, load_splits,
+                   make_dataloader, prepare_dataset, train_epochs)
+from resource_usage import peak_rss_mb
+from token_cache import CACHE_DIR, TokenCache
+
+
+def seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def synthetic_rows(count, vocab_size, min_len, max_len, seed):
+    """Random token sequences and labels with a seeded, uniform length distribution"""
+    rng = np.random.RandomState(seed)
+    # Stay clear of the special/unused ids at the start of BERT-style vocabularies
+    low = min(1000, vocab_size // 2)
+    rows = []
+    for _ in range(count):
+        length = int(rng.randint(min_len, max_len + 1))
+        rows.append({"input_ids": rng.randint(low, vocab_size, size=length).tolist(),
+                     "attention_mask": [1] * length,
+                     "label": int(rng.randint(0, 2))})
+    return rows
+
+
+def run_scenario(train_rows, eval_rows, tokenizer, args):
+    """Fixed-seed train + eval pass on fresh model weights; returns a JSON-serializable result"""
+    seed_everything(args.seed)
+    model = AutoModelForSequenceClassification.from_pretrained(args.model_name, num_labels=2).to(device)
+    optimizer = AdamW(model.parameters(), lr=2e-5)
+    train_loader = make_dataloader(train_rows, tokenizer, args.batch_size, shuffle=True)
+    eval_loader = make_dataloader(eval_rows, tokenizer, args.batch_size)
+
+    history = train_epochs(model, optimizer, train_loader, args.epochs)
+
+    eval_start = time.perf_counter()
+    accuracy, _ = evaluate(model, eval_loader)
+    eval_seconds = time.perf_counter() - eval_start
+
+    return {
+        "train": history,
+        "eval": {"accuracy": accuracy, "seconds": eval_seconds, "samples_per_sec": len(eval_rows) / eval_seconds},
+        "train_samples": len(train_rows),
+        "eval_samples": len(eval_rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducible training/eval benchmark; prints JSON")
+    parser.add_argument("--model-name", default=MODEL_NAME)
+    parser.add_argument("--data-file", default=DATA_FILE)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--scenarios", nargs="+", default=["synthetic", "real"], choices=["synthetic", "real"])
+    parser.add_argument("--train-samples", type=int, default=256)
+    parser.add_argument("--eval-samples", type=int, default=256)
+    parser.add_argument("--synthetic-min-len", type=int, default=16)
+    parser.add_argument("--synthetic-max-len", type=int, default=128)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Progress output goes to stderr so stdout carries only the JSON report
+    results = {}
+    with contextlib.redirect_stdout(sys.stderr):
+        cache = TokenCache(args.model_name, MAX_LENGTH, cache_dir=args.cache_dir)
+        tokenizer = cache.load_tokenizer()
+
+        if "synthetic" in args.scenarios:
+            rows = synthetic_rows(args.train_samples + args.eval_samples, len(tokenizer),
+                                  args.synthetic_min_len, args.synthetic_max_len, args.seed)
+            results["synthetic"] = run_scenario(rows[:args.train_samples], rows[args.train_samples:],
+                                                tokenizer, args)
+        if "real" in args.scenarios:
+            _, train_split, test_split = load_splits(args.data_file, DEDUP_THRESHOLD)
+            train_rows, _ = prepare_dataset(train_split.select(range(min(args.train_samples, len(train_split)))), cache)
+            eval_rows, _ = prepare_dataset(test_split.select(range(min(args.eval_samples, len(test_split)))), cache)
+            results["real"] = run_scenario(train_rows, eval_rows, tokenizer, args)
+
+    report = {
+        "config": vars(args),
+        "environment": {
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "platform": platform.platform(),
+            "device": str(device),
+            "torch_threads": torch.get_num_threads(),
+        },
+        "results": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from label_store import LabelStore, lead_id
+from resource_usage import peak_rss_mb
+from review_engine import LEADS_FILE, ReviewEngine
+
+PLATFORMS = ["REDDIT", "LINKEDIN", "X", "UPWORK"]
+WORDS = ("we are hiring a video editor for our youtube channel looking for a freelance motion designer "
+         "to cut shorts and reels for hire experienced editor available dm me portfolio thumbnail").split()
+# Relative frequency of each action in a synthetic review session
+ACTIONS = {"classify": 0.6, "next": 0.15, "previous": 0.1, "delete": 0.05, "jump": 0.1}
+
+
+def synthetic_leads(count, seed):
+    rng = random.Random(seed)
+    return [{"text": f"[LINKEDIN] lead {i} {rng.getrandbits(64):016x} hiring a video editor"} for i in range(count)]
+
+
+def write_leads_file(path, count, seed):
+    """leads.jsonl of templated [PLATFORM] posts, unique per line"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 60)))
+            f.write(json.dumps({"text": f"[{rng.choice(PLATFORMS)}] {words} #{i}"}) + '\n')
+
+
+def keystroke_latency(size, keystrokes, seed):
+    """Per-keystroke cost of classify / reclassify / delete against a store already holding size labels"""
+    rng = random.Random(seed)
+    leads = synthetic_leads(size + keystrokes, seed)
+    store = LabelStore()
+    for lead in leads[:size]:
+        store.set_label(lead, rng.randint(0, 1))
+
+    fresh = leads[size:]
+    labeled = rng.sample(leads[:size], min(keystrokes, size))
+    timings = {}
+
+    start = time.perf_counter()
+    for lead in fresh:
+        store.set_label(lead, 1)
+    timings["classify"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for lead in labeled:
+        store.set_label(lead, 1 - store.label_of(lead_id(lead["text"])))
+    timings["reclassify"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for lead in labeled:
+        store.remove(lead_id(lead["text"]))
+    timings["delete"] = time.perf_counter() - start
+
+    return {name: {"us_per_key": seconds / keystrokes * 1e6} for name, seconds in timings.items()}
+
+
+def latency_summary(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {"count": len(ms), "mean_ms": float(ms.mean()), "p50_ms": float(np.percentile(ms, 50)),
+            "p99_ms": float(np.percentile(ms, 99)), "max_ms": float(ms.max())}
+
+
+def replay_session(size, actions, autosave_every, seed):
+    """Open a fresh size-lead leads.jsonl in a ReviewEngine and replay a seeded random session on it"""
+    with tempfile.TemporaryDirectory() as root:
+        write_leads_file(os.path.join(root, LEADS_FILE), size, seed)
+        start = time.perf_counter()
+        engine = ReviewEngine(root=root)
+        engine.load_session()
+        engine.view()
+        open_seconds = time.perf_counter() - start
+
+        rng = random.Random(seed)
+        names = list(ACTIONS)
+        weights = [ACTIONS[name] for name in names]
+        latencies = {name: [] for name in names}
+        autosaves = []
+        for step in range(actions):
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            if name == "classify":
+                engine.classify(rng.randint(0, 1))
+            elif name == "next":
+                engine.next()
+            elif name == "previous":
+                engine.previous()
+            elif name == "delete":
+                engine.delete()
+                engine.next()
+            else:
+                engine.jump(rng.randint(1, len(engine.leads)))
+            # What the GUI does after every action: render the lead it landed on
+            engine.view()
+            latencies[name].append(time.perf_counter() - start)
+            if (step + 1) % autosave_every == 0:
+                start = time.perf_counter()
+                engine.autosave()
+                autosaves.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        engine.compact()
+        compact_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ReviewEngine(root=root).load_session()
+        reopen_seconds = time.perf_counter() - start
+
+    return {
+        "open_seconds": open_seconds,
+        "reopen_seconds": reopen_seconds,
+        "actions": {name: latency_summary(seconds) for name, seconds in latencies.items() if seconds},
+        "autosave": latency_summary(autosaves) if autosaves else None,
+        "compact_seconds": compact_seconds,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_isolated(fn, *args):
+    """Run fn in a fresh process so peak RSS is per scenario"""
+    with mp.get_context("spawn").Pool(1) as pool:
+        return pool.apply(fn, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless review latency benchmarks; prints JSON")
+    parser.add_argument("--suites", nargs="+", default=["store", "session"], choices=["store", "session"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000],
+                        help="Labeled leads in the store suite")
+    parser.add_argument("--keystrokes", type=int, default=1_000)
+    parser.add_argument("--session-sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Leads in the generated leads.jsonl of the session suite")
+    parser.add_argument("--actions", type=int, default=2_000, help="Review actions replayed per session")
+    parser.add_argument("--autosave-every", type=int, default=50, help="Actions between autosaves")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {}
+    if "store" in args.suites:
+        results["store"] = {str(size): keystroke_latency(size, args.keystrokes, args.seed) for size in args.sizes}
+    if "session" in args.suites:
+        results["session"] = {str(size): run_isolated(replay_session, size, args.actions, args.autosave_every, args.seed)
+                              for size in args.session_sizes}
+
+    report = {
+        "config": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import json
+import os
+import time
+
+import torch
+
+CHECKPOINT_ROOT = "./checkpoints"
+LATEST_FILE = "LATEST"
+KEY_SIZE = 16
+
+
+def version_name(version):
+    return f"v{version:04d}"
+
+
+def latest_checkpoint(root=CHECKPOINT_ROOT):
+    """Return the path of the newest checkpoint under root, or None"""
+    latest_path = os.path.join(root, LATEST_FILE)
+    if not os.path.exists(latest_path):
+        return None
+    with open(latest_path, 'r', encoding='utf-8') as f:
+        return os.path.join(root, f.read().strip())
+
+
+def resolve_checkpoint(path=CHECKPOINT_ROOT):
+    """Accept either a checkpoint directory or a checkpoint root (resolved through LATEST)"""
+    if os.path.exists(os.path.join(path, "config.json")):
+        return path
+    latest = latest_checkpoint(path)
+    if latest is None:
+        raise FileNotFoundError(f"No checkpoint found in {path}")
+    return latest
+
+
+def load_manifest(path):
+    with open(os.path.join(path, "manifest.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_seen_keys(path):
+    """Text hashes of every row the checkpoint has been trained on"""
+    with open(os.path.join(path, "seen_keys.bin"), 'rb') as f:
+        data = f.read()
+    return {data[i:i + KEY_SIZE] for i in range(0, len(data), KEY_SIZE)}
+
+
+def load_training_state(path):
+    return torch.load(os.path.join(path, "training_state.pt"), map_location="cpu")
+
+
+def save_checkpoint(model, tokenizer, optimizer, seen_keys, root=CHECKPOINT_ROOT, **info):
+    """Write the next versioned checkpoint (model, tokenizer, optimizer state, seen rows) and mark it latest"""
+    os.makedirs(root, exist_ok=True)
+    latest = latest_checkpoint(root)
+    version = load_manifest(latest)["version"] + 1 if latest else 1
+    path = os.path.join(root, version_name(version))
+
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    torch.save({"optimizer": optimizer.state_dict()}, os.path.join(path, "training_state.pt"))
+    with open(os.path.join(path, "seen_keys.bin"), 'wb') as f:
+        f.write(b"".join(sorted(seen_keys)))
+    manifest = {"version": version, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "num_seen": len(seen_keys), **info}
+    with open(os.path.join(path, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap the LATEST pointer atomically so readers never see a half-written name
+    tmp_path = os.path.join(root, LATEST_FILE + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version_name(version))
+    os.replace(tmp_path, os.path.join(root, LATEST_FILE))
+    return path
@@ -0,0 +1,35 @@
+import contextlib
+
+import torch
+
+
+def bf16_supported():
+    """Whether this CPU has native bf16 matmul support (AVX512-BF16 or AMX)"""
+    checks = [getattr(torch.cpu, name, None) for name in ("_is_avx512_bf16_supported", "_is_amx_tile_supported")]
+    if any(check is not None for check in checks):
+        return any(check() for check in checks if check is not None)
+    try:
+        with open("/proc/cpuinfo", 'r', encoding='utf-8') as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def configure_threads(intra_op=None, inter_op=None):
+    """Set torch thread pools; inter-op can only be set before any parallel work has run"""
+    if intra_op:
+        torch.set_num_threads(intra_op)
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError as e:
+            print(f"Could not set inter-op threads: {e}")
+    return torch.get_num_threads(), torch.get_num_interop_threads()
+
+
+def autocast(device, enabled):
+    """bf16 autocast for the forward pass, or a no-op"""
+    if not enabled:
+        return contextlib.nullcontext()
+    return torch.autocast(device_type=device.type, dtype=torch.bfloat16)
@@ -0,0 +1,128 @@
+import argparse
+import json
+import pickle
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+MERSENNE_PRIME = (1 << 31) - 1
+URL_RE = re.compile(r"https?://\S+")
+WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text, k=3):
+    """Word k-grams of the lowercased text, with URLs dropped (they are mostly unique tracking links)"""
+    words = WORD_RE.findall(URL_RE.sub(" ", text.lower()))
+    if len(words) <= k:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def choose_bands(threshold, num_perm):
+    """Pick (bands, rows) with bands * rows == num_perm whose LSH threshold (1/b)^(1/r) is closest"""
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+class NearDuplicateIndex:
+    """MinHash signatures with banded LSH buckets for near-duplicate lookup.
+
+    Lookups cost one bucket probe per band plus a signature comparison for each
+    candidate, independent of how many texts are indexed.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.buckets = [defaultdict(list) for _ in range(self.bands)]
+        self.signatures = {}
+
+    def signature(self, text):
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) & MERSENNE_PRIME for s in shingles(text)), dtype=np.uint64)
+        return ((self.a[:, None] * hashes[None, :] + self.b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def query(self, text=None, signature=None):
+        """Return [(key, estimated Jaccard similarity)] of indexed texts at or above the threshold"""
+        if signature is None:
+            signature = self.signature(text)
+        candidates = set()
+        for band, band_key in zip(self.buckets, self._band_keys(signature)):
+            candidates.update(band.get(band_key, ()))
+        matches = []
+        for key in candidates:
+            similarity = float((self.signatures[key] == signature).mean())
+            if similarity >= self.threshold:
+                matches.append((key, similarity))
+        return sorted(matches, key=lambda m: -m[1])
+
+    def add(self, key, text=None, signature=None):
+        if signature is None:
+            signature = self.signature(text)
+        self.signatures[key] = signature
+        for band, band_key in zip(self.buckets, self._band_keys(signature)):
+            band[band_key].append(key)
+
+    def add_if_new(self, key, text):
+        """Index the text unless it near-duplicates something already indexed; returns that key, or None"""
+        signature = self.signature(text)
+        matches = self.query(signature=signature)
+        if matches:
+            return matches[0][0]
+        self.add(key, signature=signature)
+        return None
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+
+def deduplicate(texts, threshold=0.8, num_perm=128):
+    """Return the indices of texts to keep (first occurrence of each near-duplicate cluster) and the index"""
+    index = NearDuplicateIndex(threshold, num_perm)
+    keep = [i for i, text in enumerate(texts) if index.add_if_new(i, text) is None]
+    return keep, index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drop near-duplicate leads from a JSONL file")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Jaccard similarity counted as a duplicate")
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--save-index", help="Pickle the resulting index here for checking new leads later")
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    keep, index = deduplicate([row["text"] for row in rows], args.threshold, args.num_perm)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for i in keep:
+            f.write(json.dumps(rows[i]) + '\n')
+    print(f"Kept {len(keep)} of {len(rows)} leads ({len(rows) - len(keep)} near-duplicates removed, "
+          f"{index.bands} bands x {index.rows} rows)")
+
+    if args.save_index:
+        index.save(args.save_index)
+        print(f"Saved index to {args.save_index}")
+
+
+if __name__ == "__main__":
+    main()
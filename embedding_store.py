@@ -0,0 +1,94 @@
+import json
+import os
+import re
+
+import numpy as np
+
+from token_cache import text_key
+
+EMBEDDING_DIR = "./.cache/embeddings"
+KEY_SIZE = 16
+
+
+class EmbeddingStore:
+    """Append-only on-disk store of pooled encoder embeddings, addressed by text hash.
+
+    vectors.bin holds float32 rows read back through a memmap; keys.bin holds the
+    16-byte text hash of each row in the same order.
+    """
+
+    def __init__(self, model_name, cache_dir=EMBEDDING_DIR):
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name).strip("_")
+        self.root = os.path.join(cache_dir, slug)
+        self.vectors_path = os.path.join(self.root, "vectors.bin")
+        self.keys_path = os.path.join(self.root, "keys.bin")
+        self.meta_path = os.path.join(self.root, "meta.json")
+        os.makedirs(self.root, exist_ok=True)
+
+        self.model_name = model_name
+        self.dim = None
+        self.rows = {}
+        self._vectors = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            self.dim = json.load(f)["dim"]
+        with open(self.keys_path, "rb") as f:
+            data = f.read()
+        # Only trust rows whose vectors were fully written
+        stored = os.path.getsize(self.vectors_path) // (4 * self.dim) if os.path.exists(self.vectors_path) else 0
+        count = min(len(data) // KEY_SIZE, stored)
+        for row in range(count):
+            self.rows[data[row * KEY_SIZE:(row + 1) * KEY_SIZE]] = row
+        # Drop the tail of an interrupted write so new rows stay aligned with their keys
+        if os.path.exists(self.vectors_path):
+            os.truncate(self.vectors_path, count * 4 * self.dim)
+        os.truncate(self.keys_path, count * KEY_SIZE)
+
+    def _vectors_view(self):
+        if self._vectors is None:
+            count = len(self.rows)
+            if count == 0:
+                return np.zeros((0, self.dim or 0), dtype=np.float32)
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+        return self._vectors
+
+    def __len__(self):
+        return len(self.rows)
+
+    def encode(self, texts, embed_fn, batch_size=256):
+        """Return an (len(texts), dim) array of embeddings, calling embed_fn only for unseen texts.
+
+        embed_fn takes a list of texts and returns a float32 array of shape (n, dim).
+        The second return value is the number of texts that had to be embedded.
+        """
+        keys = [text_key(text) for text in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self.rows and key not in missing:
+                missing[key] = text
+
+        if missing:
+            pending = list(missing.items())
+            with open(self.vectors_path, "ab") as vectors_file, open(self.keys_path, "ab") as keys_file:
+                for start in range(0, len(pending), batch_size):
+                    chunk = pending[start:start + batch_size]
+                    vectors = np.ascontiguousarray(embed_fn([text for _, text in chunk]), dtype=np.float32)
+                    if self.dim is None:
+                        self.dim = vectors.shape[1]
+                        with open(self.meta_path, "w", encoding="utf-8") as f:
+                            json.dump({"model_name": self.model_name, "dim": self.dim}, f)
+                    # Vectors first, then keys, so a crash never leaves keys without rows
+                    vectors_file.write(vectors.tobytes())
+                    vectors_file.flush()
+                    keys_file.write(b"".join(key for key, _ in chunk))
+                    keys_file.flush()
+                    for key, _ in chunk:
+                        self.rows[key] = len(self.rows)
+            self._vectors = None
+
+        rows = np.fromiter((self.rows[key] for key in keys), dtype=np.int64, count=len(keys))
+        return np.asarray(self._vectors_view()[rows]), len(missing)
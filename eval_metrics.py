@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+
+from checkpoints import CHECKPOINT_ROOT, resolve_checkpoint
+
+LOGITS_FILE = "eval_logits.npz"
+PLATFORM_RE = re.compile(r"^\[([A-Z]+)\]")
+
+
+def platform_of(text):
+    match = PLATFORM_RE.match(text)
+    return match.group(1) if match else "UNKNOWN"
+
+
+def save_eval_logits(path, ids, texts, logits, labels):
+    """Store evaluation logits with their example ids (text hashes) and platform tags"""
+    np.savez_compressed(
+        path,
+        ids=np.asarray(ids),
+        platforms=np.asarray([platform_of(text) for text in texts]),
+        logits=np.asarray(logits, dtype=np.float32),
+        labels=np.asarray(labels, dtype=np.int64),
+    )
+
+
+def softmax_scores(logits):
+    """Probability of label 1 from 2-class logits"""
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp[:, 1] / exp.sum(axis=1)
+
+
+def threshold_metrics(scores, labels, threshold):
+    preds = scores >= threshold
+    tp = np.sum(preds & (labels == 1))
+    fp = np.sum(preds & (labels == 0))
+    fn = np.sum(~preds & (labels == 1))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"threshold": float(threshold), "accuracy": float(np.mean(preds == (labels == 1))),
+            "precision": float(precision), "recall": float(recall), "f1": float(f1), "count": int(len(labels))}
+
+
+def curves(scores, labels):
+    """PR and ROC curves over every distinct score, computed from one sort"""
+    order = np.argsort(-scores, kind="stable")
+    sorted_scores = scores[order]
+    positives = labels[order] == 1
+    tp = np.cumsum(positives)
+    fp = np.cumsum(~positives)
+    # Keep only the last index of each run of tied scores
+    last = np.append(sorted_scores[1:] != sorted_scores[:-1], True)
+    tp, fp, thresholds = tp[last], fp[last], sorted_scores[last]
+
+    total_pos = max(int(positives.sum()), 1)
+    total_neg = max(int((~positives).sum()), 1)
+    precision = tp / (tp + fp)
+    recall = tp / total_pos
+    tpr = np.concatenate([[0.0], recall])
+    fpr = np.concatenate([[0.0], fp / total_neg])
+    f1 = np.where(precision + recall > 0, 2 * precision * recall / np.maximum(precision + recall, 1e-12), 0.0)
+    return {
+        "thresholds": thresholds,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "fpr": fpr,
+        "tpr": tpr,
+        "roc_auc": float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2)),
+        # Average precision: precision weighted by each step in recall
+        "average_precision": float(np.sum(np.diff(np.concatenate([[0.0], recall])) * precision)),
+    }
+
+
+def calibration(scores, labels, bins=10):
+    """Reliability table and expected calibration error over equal-width score bins"""
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    which = np.clip(np.digitize(scores, edges[1:-1]), 0, bins - 1)
+    counts = np.bincount(which, minlength=bins)
+    mean_score = np.bincount(which, weights=scores, minlength=bins) / np.maximum(counts, 1)
+    positive_rate = np.bincount(which, weights=labels, minlength=bins) / np.maximum(counts, 1)
+    ece = float(np.sum(counts / max(len(scores), 1) * np.abs(mean_score - positive_rate)))
+    table = [{"bin": f"{edges[i]:.1f}-{edges[i + 1]:.1f}", "count": int(counts[i]),
+              "mean_score": float(mean_score[i]), "positive_rate": float(positive_rate[i])}
+             for i in range(bins) if counts[i]]
+    return {"ece": ece, "bins": table}
+
+
+def summarize(data, threshold=0.5, bins=10):
+    scores = softmax_scores(data["logits"])
+    labels = data["labels"]
+    curve = curves(scores, labels)
+    best = int(np.argmax(curve["f1"]))
+    report = {
+        "at_threshold": threshold_metrics(scores, labels, threshold),
+        "best_f1": threshold_metrics(scores, labels, curve["thresholds"][best]),
+        "roc_auc": curve["roc_auc"],
+        "average_precision": curve["average_precision"],
+        "calibration": calibration(scores, labels, bins),
+        "per_platform": {},
+    }
+    for platform in np.unique(data["platforms"]):
+        mask = data["platforms"] == platform
+        report["per_platform"][str(platform)] = threshold_metrics(scores[mask], labels[mask], threshold)
+    return report, curve
+
+
+def print_report(report):
+    def line(name, m):
+        return (f"{name:>16}: n={m['count']:<6} acc {m['accuracy']:.4f}  precision {m['precision']:.4f}  "
+                f"recall {m['recall']:.4f}  F1 {m['f1']:.4f}")
+
+    print(line(f"@ {report['at_threshold']['threshold']:.3f}", report["at_threshold"]))
+    print(line(f"best F1 @ {report['best_f1']['threshold']:.3f}", report["best_f1"]))
+    print(f"ROC AUC {report['roc_auc']:.4f}, average precision {report['average_precision']:.4f}, "
+          f"ECE {report['calibration']['ece']:.4f}")
+    print("Calibration (score bin: count, mean score, positive rate):")
+    for row in report["calibration"]["bins"]:
+        print(f"  {row['bin']}: {row['count']:6d}  {row['mean_score']:.3f}  {row['positive_rate']:.3f}")
+    print("Per platform:")
+    for platform, m in report["per_platform"].items():
+        print(line(platform, m))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics and threshold sweeps from cached evaluation logits")
+    parser.add_argument("logits", nargs="?", default=CHECKPOINT_ROOT,
+                        help=f"{LOGITS_FILE} file, or a checkpoint directory/root containing one")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--bins", type=int, default=10, help="Calibration bins")
+    parser.add_argument("--json", help="Write the report (and curves) as JSON here")
+    args = parser.parse_args()
+
+    path = args.logits if os.path.isfile(args.logits) else os.path.join(resolve_checkpoint(args.logits), LOGITS_FILE)
+    with np.load(path) as f:
+        data = {key: f[key] for key in f.files}
+    report, curve = summarize(data, args.threshold, args.bins)
+    print(f"{path}: {len(data['labels'])} examples")
+    print_report(report)
+
+    if args.json:
+        report["curves"] = {key: value.tolist() if isinstance(value, np.ndarray) else value
+                            for key, value in curve.items()}
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
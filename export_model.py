@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer
+
+from checkpoints import CHECKPOINT_ROOT, resolve_checkpoint
+from index import DATA_FILE, DEDUP_THRESHOLD, MAX_LENGTH, load_classifier, load_splits
+
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantType, quantize_dynamic as ort_quantize_dynamic
+except ImportError:
+    ort = None
+
+BATCH_SIZES = [1, 16, 64]
+INT8_STATE_FILE = "int8_state_dict.pt"
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+
+
+def quantize(model):
+    """Dynamic int8 quantization of every Linear layer (weights int8, activations quantized on the fly)"""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_quantized(checkpoint):
+    """Rebuild the int8 model saved by export_model.py next to a checkpoint"""
+    model = quantize(load_classifier(checkpoint).eval())
+    model.load_state_dict(torch.load(os.path.join(checkpoint, INT8_STATE_FILE)))
+    return model
+
+
+def export_onnx(model, path):
+    """Export with dynamic batch and sequence axes"""
+    dummy = torch.ones(2, 8, dtype=torch.long)
+    torch.onnx.export(
+        model, (dummy, dummy), path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={"input_ids": {0: "batch", 1: "sequence"},
+                      "attention_mask": {0: "batch", 1: "sequence"},
+                      "logits": {0: "batch"}},
+        opset_version=17,
+        dynamo=False,
+    )
+
+
+def torch_runner(model):
+    def run(input_ids, attention_mask):
+        with torch.inference_mode():
+            return model(input_ids=torch.from_numpy(input_ids), attention_mask=torch.from_numpy(attention_mask)).logits.numpy()
+    return run
+
+
+def onnx_runner(path, threads):
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    def run(input_ids, attention_mask):
+        return session.run(["logits"], {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+    return run
+
+
+def encode_batches(tokenizer, texts, batch_size):
+    """Tokenize and pad texts into (input_ids, attention_mask) int64 batches, grouped by length"""
+    encoded = tokenizer(texts, truncation=True, max_length=MAX_LENGTH)["input_ids"]
+    order = sorted(range(len(texts)), key=lambda i: len(encoded[i]))
+    batches = []
+    for start in range(0, len(order), batch_size):
+        rows = order[start:start + batch_size]
+        batch = tokenizer.pad([{"input_ids": encoded[i]} for i in rows], padding="longest", return_tensors="np")
+        batches.append((rows, batch["input_ids"].astype(np.int64), batch["attention_mask"].astype(np.int64)))
+    return batches
+
+
+def predict(run, batches, count):
+    logits = np.zeros((count, 2), dtype=np.float32)
+    for rows, input_ids, attention_mask in batches:
+        logits[rows] = run(input_ids, attention_mask)
+    return logits
+
+
+def benchmark(run, batches, seconds):
+    """Return (median ms per batch, samples/sec) from repeatedly running the given batches"""
+    run(*batches[0][1:])  # warm-up
+    timings = []
+    samples = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _, input_ids, attention_mask in batches:
+            start = time.perf_counter()
+            run(input_ids, attention_mask)
+            timings.append(time.perf_counter() - start)
+            samples += len(input_ids)
+            if time.perf_counter() >= deadline:
+                break
+    return 1000 * float(np.median(timings)), samples / sum(timings)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export int8/ONNX CPU artifacts of a checkpoint and benchmark them")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_ROOT)
+    parser.add_argument("--data-file", default=DATA_FILE)
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="Must match the value used for training so the test split is the same")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="Maximum test accuracy drop vs. fp32 for an artifact to be eligible")
+    parser.add_argument("--bench-seconds", type=float, default=5.0, help="Time budget per artifact and batch size")
+    parser.add_argument("--bench-samples", type=int, default=256, help="Test texts used for the latency benchmark")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    checkpoint = resolve_checkpoint(args.checkpoint)
+    torch.set_num_threads(args.threads)
+
+    tokenizer = AutoTokenizer.from_pretrained(checkpoint)
+    model = load_classifier(checkpoint).eval()
+
+    # Build artifacts
+    int8_model = quantize(model)
+    torch.save(int8_model.state_dict(), os.path.join(checkpoint, INT8_STATE_FILE))
+    runners = {"torch-fp32": torch_runner(model), "torch-int8": torch_runner(int8_model)}
+
+    if ort is None:
+        print("onnxruntime not installed, skipping the ONNX artifacts")
+    else:
+        onnx_path = os.path.join(checkpoint, ONNX_FILE)
+        onnx_int8_path = os.path.join(checkpoint, ONNX_INT8_FILE)
+        export_onnx(model, onnx_path)
+        ort_quantize_dynamic(onnx_path, onnx_int8_path, weight_type=QuantType.QInt8)
+        runners["onnx-fp32"] = onnx_runner(onnx_path, args.threads)
+        runners["onnx-int8"] = onnx_runner(onnx_int8_path, args.threads)
+    print(f"Artifacts written to {checkpoint}")
+
+    # Accuracy parity on the test split
+    _, _, test_split = load_splits(args.data_file, args.dedup_threshold)
+    texts = list(test_split["text"])
+    labels = np.asarray(test_split["label"])
+    batches = encode_batches(tokenizer, texts, 64)
+    reference = predict(runners["torch-fp32"], batches, len(texts)).argmax(axis=1)
+    report = {"checkpoint": checkpoint, "threads": args.threads, "artifacts": {}}
+    for name, run in runners.items():
+        preds = predict(run, batches, len(texts)).argmax(axis=1)
+        report["artifacts"][name] = {
+            "accuracy": float((preds == labels).mean()),
+            "agreement_with_fp32": float((preds == reference).mean()),
+        }
+    base_acc = report["artifacts"]["torch-fp32"]["accuracy"]
+
+    # Latency/throughput per batch size
+    bench_texts = texts[:args.bench_samples]
+    for batch_size in BATCH_SIZES:
+        bench_batches = encode_batches(tokenizer, bench_texts, batch_size)
+        for name, run in runners.items():
+            latency_ms, throughput = benchmark(run, bench_batches, args.bench_seconds)
+            report["artifacts"][name][f"batch_{batch_size}"] = {"latency_ms": latency_ms, "samples_per_sec": throughput}
+
+    print(f"{'artifact':>12} {'acc':>7} {'agree':>7}" + "".join(f" {'bs' + str(b) + ' ms':>10} {'samples/s':>10}" for b in BATCH_SIZES))
+    for name, stats in report["artifacts"].items():
+        line = f"{name:>12} {stats['accuracy']:7.4f} {stats['agreement_with_fp32']:7.4f}"
+        for batch_size in BATCH_SIZES:
+            bench = stats[f"batch_{batch_size}"]
+            line += f" {bench['latency_ms']:10.2f} {bench['samples_per_sec']:10.1f}"
+        print(line)
+
+    # Pick the fastest artifact (at the largest batch size) that stays within tolerance
+    eligible = [name for name, stats in report["artifacts"].items() if base_acc - stats["accuracy"] <= args.tolerance]
+    best = max(eligible, key=lambda name: report["artifacts"][name][f"batch_{BATCH_SIZES[-1]}"]["samples_per_sec"])
+    report["recommended"] = best
+    print(f"Recommended artifact (accuracy drop <= {args.tolerance}): {best}")
+
+    with open(os.path.join(checkpoint, "export_report.json"), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import json
+import os
+import re
+
+RULES_FILE = "highlight_rules.json"
+DEFAULT_RULES = [
+    {"tag": "green_highlight", "background": "#90EE90", "foreground": "black", "phrases": ["video editor", "hiring"]},
+    {"tag": "red_highlight", "background": "#FFB6C1", "foreground": "black", "phrases": ["for hire"]},
+]
+
+
+def load_rules(path=RULES_FILE):
+    """Highlight rules ({tag, background, foreground, phrases}) from a JSON config, or the built-in defaults"""
+    if not os.path.exists(path):
+        return DEFAULT_RULES
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["rules"]
+
+
+class KeywordHighlighter:
+    """Every phrase of every rule compiled into one case-insensitive alternation.
+
+    A single finditer pass over the text finds all matches; longer phrases are
+    tried first so "for hire" wins over a shorter phrase starting at the same
+    place. When a phrase appears in several rules the first rule wins.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.tag_of = {}
+        for rule in rules:
+            for phrase in rule["phrases"]:
+                self.tag_of.setdefault(phrase.lower(), rule["tag"])
+        phrases = sorted(self.tag_of, key=len, reverse=True)
+        self.pattern = re.compile("|".join(map(re.escape, phrases)), re.IGNORECASE) if phrases else None
+
+    def spans(self, text):
+        """{tag: [(start, end), ...]} character offsets of every match in text"""
+        spans = {rule["tag"]: [] for rule in self.rules}
+        if self.pattern is not None:
+            for match in self.pattern.finditer(text):
+                tag = self.tag_of.get(match.group().lower())
+                if tag is not None:
+                    spans[tag].append(match.span())
+        return spans
+
+
+def tk_offsets(text, offsets):
+    """Map Python character offsets to Tk 8.6 text offsets, where a character outside the BMP
+    (most emoji) counts as two; offsets must be sorted"""
+    mapped = []
+    extra = 0
+    last = 0
+    for offset in offsets:
+        extra += sum(1 for ch in text[last:offset] if ord(ch) > 0xFFFF)
+        last = offset
+        mapped.append(offset + extra)
+    return mapped
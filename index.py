@@ -1,95 +1,611 @@
-from datasets import load_dataset
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from torch.utils.data import DataLoader
+import argparse
+import json
+import os
+import random
+import time
+from functools import partial
+
+from datasets import Dataset, load_dataset
+from transformers import AutoModel, AutoModelForSequenceClassification
+from transformers.modeling_outputs import SequenceClassifierOutput
+from torch.utils.data import DataLoader, Sampler
 from tqdm import tqdm
 import torch
 import torch.nn.functional as F
 from torch.optim import AdamW
 
+from checkpoints import (CHECKPOINT_ROOT, latest_checkpoint, load_manifest, load_seen_keys, load_training_state,
+                         save_checkpoint)
+from cpu_tuning import autocast, bf16_supported, configure_threads
+from dedup import deduplicate
+from embedding_store import EMBEDDING_DIR, EmbeddingStore
+from eval_metrics import LOGITS_FILE, save_eval_logits
+from instrumentation import StepProfiler, StepTimer, format_summary, parse_step_window
+from streaming_data import StreamingLeadDataset, split_of
+from token_cache import CACHE_DIR, TokenCache, text_key
+
+MODEL_NAME = "BAAI/bge-small-en"
+DATA_FILE = "./dataset-v1/data.jsonl"
+MAX_LENGTH = 512
+DEDUP_THRESHOLD = 0.8
+REVIEWED_FILES = ["./classified_leads.jsonl", "./nonleads.jsonl"]
+HEAD_FILE = "frozen_head.pt"
+
 # Use device
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-# Load dataset
-dataset = load_dataset("json", data_files="./dataset-v1/data.jsonl", split="train")
-train_test = dataset.train_test_split(test_size=0.2, seed=42)
-train_dataset = train_test["train"]
-test_dataset = train_test["test"]
-
-# Load tokenizer and model
-tokenizer = AutoTokenizer.from_pretrained("BAAI/bge-small-en")
-model = AutoModelForSequenceClassification.from_pretrained("BAAI/bge-small-en", num_labels=2)
-model.to(device)
-
-# Tokenization function with truncation and padding length fixed
-def tokenize_function(examples):
-    return tokenizer(examples["text"], padding="max_length", truncation=True, max_length=512)
-
-# Map tokenizer over datasets
-train_dataset = train_dataset.map(tokenize_function, batched=True)
-test_dataset = test_dataset.map(tokenize_function, batched=True)
-
-# Set format to torch tensors with necessary columns
-train_dataset.set_format(type="torch", columns=["input_ids", "attention_mask", "label"])
-test_dataset.set_format(type="torch", columns=["input_ids", "attention_mask", "label"])
-
-# DataLoaders
-train_dataloader = DataLoader(train_dataset, batch_size=16, shuffle=True)
-test_dataloader = DataLoader(test_dataset, batch_size=16)
-
-# Quick sanity check batch shapes
-ts = next(iter(train_dataloader))
-print(f"Batch size: {len(ts['input_ids'])}")
-print(f"Input IDs shape: {ts['input_ids'].shape}")
-print(f"Attention mask shape: {ts['attention_mask'].shape}")
-print(f"Labels shape: {ts['label'].shape}")
-
-# Optimizer
-optimizer = AdamW(model.parameters(), lr=2e-5)
-
-# Training loop
-num_epochs = 3
-model.train()
-for epoch in range(num_epochs):
-    total_loss = 0
-    correct = 0
-    total = 0
-
-    for batch in tqdm(train_dataloader, desc=f"Epoch {epoch + 1}"):
-        input_ids = batch["input_ids"].to(device)
-        attention_mask = batch["attention_mask"].to(device)
-        labels = batch["label"].to(device)
 
-        optimizer.zero_grad()
-        outputs = model(input_ids=input_ids, attention_mask=attention_mask, labels=labels)
-        loss = outputs.loss
-        logits = outputs.logits
+class LengthGroupedSampler(Sampler):
+    """Yield batches of indices whose examples have similar token lengths"""
+
+    def __init__(self, lengths, batch_size, shuffle=True, mega_batch_mult=50, seed=42):
+        self.lengths = lengths
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.mega_batch_mult = mega_batch_mult
+        self.rng = random.Random(seed)
+
+    def __iter__(self):
+        indices = list(range(len(self.lengths)))
+        if not self.shuffle:
+            # Deterministic order for evaluation: longest first so memory peaks early
+            indices.sort(key=lambda i: self.lengths[i], reverse=True)
+            batches = [indices[i:i + self.batch_size] for i in range(0, len(indices), self.batch_size)]
+            return iter(batches)
+
+        # Shuffle, then sort inside "mega batches" so batches stay random across the epoch
+        self.rng.shuffle(indices)
+        mega_size = self.batch_size * self.mega_batch_mult
+        batches = []
+        for start in range(0, len(indices), mega_size):
+            mega = sorted(indices[start:start + mega_size], key=lambda i: self.lengths[i], reverse=True)
+            batches.extend(mega[i:i + self.batch_size] for i in range(0, len(mega), self.batch_size))
+        self.rng.shuffle(batches)
+        return iter(batches)
+
+    def __len__(self):
+        return (len(self.lengths) + self.batch_size - 1) // self.batch_size
+
+
+class TokenizedDataset:
+    """Unpadded token ids served from the token cache, plus labels"""
+
+    def __init__(self, cache, spans, labels):
+        self.cache = cache
+        self.spans = spans
+        self.labels = labels
+        self.lengths = [length for _, length in spans]
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __getitem__(self, idx):
+        ids = self.cache.get(*self.spans[idx]).tolist()
+        return {"input_ids": ids, "attention_mask": [1] * len(ids), "label": self.labels[idx], "idx": idx}
+
+
+def load_splits(data_file=DATA_FILE, dedup_threshold=DEDUP_THRESHOLD):
+    """Load the labeled dataset, drop near-duplicates so they can't straddle the split, and split it.
+
+    Rows are assigned by a hash of their text (streaming_data.split_of), so appending rows to the
+    dataset never moves existing ones between train and test.
+    """
+    dataset = load_dataset("json", data_files=data_file, split="train")
+    if dedup_threshold:
+        keep, _ = deduplicate(dataset["text"], dedup_threshold)
+        print(f"Dropped {len(dataset) - len(keep)} near-duplicate rows (threshold {dedup_threshold})")
+        dataset = dataset.select(keep)
+    in_test = [split_of(text) == "test" for text in dataset["text"]]
+    train = dataset.select([i for i, test in enumerate(in_test) if not test])
+    test = dataset.select([i for i, test in enumerate(in_test) if test])
+    return dataset, train, test
+
+
+def prepare_dataset(dataset, cache):
+    """Tokenize a dataset split through the token cache; returns (dataset, newly tokenized count)"""
+    spans, tokenized = cache.encode(dataset["text"])
+    return TokenizedDataset(cache, spans, dataset["label"]), tokenized
+
+
+def make_dataloader(dataset, tokenizer, batch_size=16, shuffle=False, dynamic_padding=True, group_by_length=False,
+                    max_length=MAX_LENGTH):
+    if not dynamic_padding:
+        collate_fn = partial(tokenizer.pad, padding="max_length", max_length=max_length, return_tensors="pt")
+        return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, collate_fn=collate_fn)
+
+    # Pad each batch only up to its longest member
+    collate_fn = partial(tokenizer.pad, padding="longest", return_tensors="pt")
+    if group_by_length:
+        batch_sampler = LengthGroupedSampler(dataset.lengths, batch_size, shuffle=shuffle)
+        return DataLoader(dataset, batch_sampler=batch_sampler, collate_fn=collate_fn)
+    return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, collate_fn=collate_fn)
+
+
+def measure_throughput(model, dataloader, max_batches=None):
+    """Run inference over a dataloader and return (real tokens/sec, padded tokens/sec)"""
+    model.eval()
+    real_tokens = 0
+    padded_tokens = 0
+    start = time.perf_counter()
+    with torch.no_grad():
+        for step, batch in enumerate(dataloader):
+            if max_batches is not None and step >= max_batches:
+                break
+            input_ids = batch["input_ids"].to(device)
+            attention_mask = batch["attention_mask"].to(device)
+            model(input_ids=input_ids, attention_mask=attention_mask)
+            real_tokens += int(attention_mask.sum())
+            padded_tokens += input_ids.numel()
+    elapsed = time.perf_counter() - start
+    return real_tokens / elapsed, padded_tokens / elapsed
 
+
+def compare_padding(model, tokenizer, dataset, batch_size, max_batches):
+    """Report tokens/sec with fixed max_length padding vs. dynamic (length-grouped) padding"""
+    results = {}
+    for name, dynamic, grouped in [("fixed", False, False), ("dynamic", True, False), ("dynamic+grouped", True, True)]:
+        dataloader = make_dataloader(dataset, tokenizer, batch_size, dynamic_padding=dynamic, group_by_length=grouped)
+        real_tps, padded_tps = measure_throughput(model, dataloader, max_batches)
+        results[name] = real_tps
+        print(f"{name:>16}: {real_tps:10.1f} real tokens/sec ({padded_tps:10.1f} incl. padding)")
+    baseline = results["fixed"]
+    for name in ("dynamic", "dynamic+grouped"):
+        print(f"{name} speedup over fixed padding: {results[name] / baseline:.2f}x")
+
+
+def make_embed_fn(model_name, cache, batch_size=64):
+    """Build a callable mapping texts to L2-normalized CLS embeddings (bge pooling).
+
+    The encoder is only loaded the first time something actually needs embedding.
+    """
+    state = {}
+
+    def embed(texts):
+        if "encoder" not in state:
+            state["encoder"] = AutoModel.from_pretrained(model_name).to(device).eval()
+        encoder = state["encoder"]
+        tokenizer = cache.load_tokenizer()
+        spans, _ = cache.encode(texts)
+        # Embed in length order so each batch carries little padding, then restore input order
+        order = sorted(range(len(spans)), key=lambda i: spans[i][1])
+        out = torch.empty(len(spans), encoder.config.hidden_size)
+        with torch.no_grad():
+            for start in range(0, len(order), batch_size):
+                rows = order[start:start + batch_size]
+                features = [{"input_ids": cache.get(*spans[i]).tolist()} for i in rows]
+                batch = tokenizer.pad(features, padding="longest", return_tensors="pt")
+                hidden = encoder(input_ids=batch["input_ids"].to(device),
+                                 attention_mask=batch["attention_mask"].to(device)).last_hidden_state
+                out[rows] = F.normalize(hidden[:, 0], dim=-1).float().cpu()
+        return out.numpy()
+
+    return embed
+
+
+class FrozenEncoderClassifier(torch.nn.Module):
+    """A frozen encoder plus the linear head --frozen-encoder trained on its L2-normalized CLS embedding.
+
+    Called like a *ForSequenceClassification model (input_ids, attention_mask -> .logits), so scoring,
+    serving and export handle both kinds of checkpoint.
+    """
+
+    def __init__(self, encoder, head):
+        super().__init__()
+        self.encoder = encoder
+        self.head = head
+
+    def forward(self, input_ids, attention_mask=None):
+        hidden = self.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        return SequenceClassifierOutput(logits=self.head(F.normalize(hidden[:, 0], dim=-1)))
+
+
+def load_classifier(checkpoint):
+    """The classifier stored in a checkpoint directory: a fine-tuned *ForSequenceClassification, or a frozen
+    encoder with the head saved next to it by --frozen-encoder"""
+    head_path = os.path.join(checkpoint, HEAD_FILE)
+    if not os.path.exists(head_path):
+        return AutoModelForSequenceClassification.from_pretrained(checkpoint)
+    state = torch.load(head_path, map_location="cpu")
+    head = torch.nn.Linear(state["weight"].shape[1], state["weight"].shape[0])
+    head.load_state_dict(state)
+    return FrozenEncoderClassifier(AutoModel.from_pretrained(checkpoint), head)
+
+
+def train_head(train_x, train_y, epochs=300, lr=1e-2, weight_decay=1e-4):
+    """Fit a linear classification head on fixed embeddings with full-batch updates; returns (head, optimizer, loss)"""
+    head = torch.nn.Linear(train_x.shape[1], 2)
+    optimizer = AdamW(head.parameters(), lr=lr, weight_decay=weight_decay)
+    for _ in range(epochs):
+        optimizer.zero_grad()
+        loss = F.cross_entropy(head(train_x), train_y)
         loss.backward()
         optimizer.step()
+    return head, optimizer, loss.item()
+
+
+def run_frozen_encoder(args, train_split, test_split, cache, seen_keys):
+    """Train only a classification head on stored embeddings of a frozen encoder and save it as a checkpoint"""
+    start = time.perf_counter()
+    store = EmbeddingStore(args.model_name, cache_dir=args.embedding_dir)
+    embed_fn = make_embed_fn(args.model_name, cache, batch_size=args.batch_size * 4)
+    train_x, train_new = store.encode(train_split["text"], embed_fn)
+    test_x, test_new = store.encode(test_split["text"], embed_fn)
+    print(f"Embeddings ready in {time.perf_counter() - start:.2f}s — "
+          f"{train_new + test_new} newly embedded, {len(store)} in store")
+
+    train_x = torch.from_numpy(train_x)
+    test_x = torch.from_numpy(test_x)
+    train_y = torch.tensor(train_split["label"])
+    test_y = torch.tensor(test_split["label"])
+
+    start = time.perf_counter()
+    head, optimizer, loss = train_head(train_x, train_y, epochs=args.head_epochs, lr=args.head_lr)
+    with torch.no_grad():
+        train_acc = (head(train_x).argmax(dim=1) == train_y).float().mean().item()
+        test_acc = (head(test_x).argmax(dim=1) == test_y).float().mean().item()
+    print(f"Head trained in {time.perf_counter() - start:.2f}s — Loss: {loss:.4f}, Accuracy: {train_acc:.4f}")
+    print(f"Test Accuracy: {test_acc:.4f}")
+
+    # The checkpoint holds the unchanged encoder weights plus the head; load_classifier() puts them together
+    encoder = AutoModel.from_pretrained(args.model_name)
+    path = save_checkpoint(encoder, cache.load_tokenizer(), optimizer, seen_keys, root=args.checkpoint_root,
+                           base_model=args.model_name, parent=None, mode="frozen-encoder",
+                           train_rows=len(train_split), test_accuracy=test_acc)
+    torch.save(head.state_dict(), os.path.join(path, HEAD_FILE))
+    print(f"Saved checkpoint to {path}")
+    return head
+
+
+def train_epochs(model, optimizer, dataloader, num_epochs, profiler=None, accumulation_steps=1, use_bf16=False):
+    """Train for num_epochs and return per-epoch stats (loss, accuracy, throughput, per-phase time).
+
+    Gradients are accumulated over accumulation_steps batches per optimizer step, and the
+    forward pass runs under bf16 autocast when use_bf16 is set.
+    """
+    model.train()
+    history = []
+    global_step = 0
+    for epoch in range(num_epochs):
+        # Running sums stay on the device; they are read back once per epoch, not every step
+        total_loss = torch.zeros((), device=device)
+        correct = torch.zeros((), dtype=torch.long, device=device)
+        timer = StepTimer(device)
+
+        optimizer.zero_grad()
+        pending = 0
+        timer.start()
+        for batch in tqdm(dataloader, desc=f"Epoch {epoch + 1}"):
+            if profiler is not None:
+                profiler.step(global_step)
+            input_ids = batch["input_ids"].to(device)
+            attention_mask = batch["attention_mask"].to(device)
+            labels = batch["label"].to(device)
+            timer.mark("data")
+
+            with autocast(device, use_bf16):
+                outputs = model(input_ids=input_ids, attention_mask=attention_mask, labels=labels)
+            loss = outputs.loss
+            logits = outputs.logits
+            timer.mark("forward")
+
+            (loss / accumulation_steps).backward()
+            pending += 1
+            timer.mark("backward")
+            if pending == accumulation_steps:
+                optimizer.step()
+                optimizer.zero_grad()
+                pending = 0
+            timer.mark("optimizer")
+
+            total_loss += loss.detach()
+            correct += (torch.argmax(logits, dim=1) == labels).sum()
+            timer.count(labels.size(0), int(batch["attention_mask"].sum()))
+            global_step += 1
+
+        # Flush gradients left over from an incomplete accumulation window
+        if pending:
+            optimizer.step()
+            optimizer.zero_grad()
+
+        stats = timer.summary()
+        stats.update(epoch=epoch + 1, loss=total_loss.item() / timer.steps, accuracy=correct.item() / timer.samples)
+        history.append(stats)
+        print(f"Epoch {epoch+1} — Loss: {stats['loss']:.4f}, Accuracy: {stats['accuracy']:.4f}, "
+              f"{format_summary(stats)}")
+
+    if profiler is not None:
+        profiler.stop()
+    return history
+
+
+def evaluate(model, dataloader, use_bf16=False):
+    """Return (accuracy, outputs) where outputs holds the logits, labels and dataset indices of every example"""
+    model.eval()
+    # Logits stay on the device and are read back once at the end
+    logits, labels, indices = [], [], []
+
+    with torch.no_grad():
+        for batch in dataloader:
+            input_ids = batch["input_ids"].to(device)
+            attention_mask = batch["attention_mask"].to(device)
+
+            with autocast(device, use_bf16):
+                outputs = model(input_ids=input_ids, attention_mask=attention_mask)
+            logits.append(outputs.logits.float())
+            labels.append(batch["label"].to(device))
+            if "idx" in batch:
+                indices.append(batch["idx"])
+
+    logits = torch.cat(logits)
+    labels = torch.cat(labels)
+    accuracy = (logits.argmax(dim=1) == labels).float().mean().item()
+    return accuracy, {"logits": logits.cpu().numpy(), "labels": labels.cpu().numpy(),
+                      "idx": torch.cat(indices).numpy() if indices else None}
+
+
+def load_reviewed_rows(paths):
+    """Labeled rows written by lead_classifier_gui.py (classified_leads.jsonl / nonleads.jsonl)"""
+    rows = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    lead = json.loads(line)
+                    rows.append({"text": lead["text"], "label": int(lead["label"])})
+    return rows
+
+
+def select_incremental_rows(pool, seen_keys, test_keys, replay_ratio, seed=42):
+    """Rows not trained on by the previous checkpoint, mixed with a replay sample of ones that were"""
+    new_rows, old_rows = [], []
+    new_keys = set()
+    for row in pool:
+        key = text_key(row["text"])
+        if key in test_keys:
+            continue
+        if key in seen_keys:
+            old_rows.append(row)
+        elif key not in new_keys:
+            new_keys.add(key)
+            new_rows.append(row)
+
+    rng = random.Random(seed)
+    replay = rng.sample(old_rows, min(len(old_rows), int(len(new_rows) * replay_ratio)))
+    return new_rows, replay, new_keys
+
+
+def compare_cpu_modes(args, model_source, train_dataloader, test_dataloader, use_bf16):
+    """Train the baseline loop and the CPU performance mode from the same weights and seed, and compare"""
+    configs = [
+        ("baseline", {"accumulation_steps": 1, "use_bf16": False, "compile": False}),
+        ("cpu-perf", {"accumulation_steps": args.grad_accum, "use_bf16": use_bf16, "compile": args.compile}),
+    ]
+    results = {}
+    for name, config in configs:
+        torch.manual_seed(42)
+        random.seed(42)
+        model = AutoModelForSequenceClassification.from_pretrained(model_source, num_labels=2).to(device)
+        optimizer = AdamW(model.parameters(), lr=args.lr)
+        run_model = torch.compile(model, dynamic=True) if config["compile"] else model
+
+        start = time.perf_counter()
+        train_epochs(run_model, optimizer, train_dataloader, args.epochs,
+                     accumulation_steps=config["accumulation_steps"], use_bf16=config["use_bf16"])
+        seconds = time.perf_counter() - start
+        accuracy, _ = evaluate(run_model, test_dataloader, use_bf16=config["use_bf16"])
+        results[name] = (seconds, accuracy)
+        print(f"{name}: {seconds:.1f}s training, test accuracy {accuracy:.4f} ({config})")
+
+    (base_s, base_acc), (perf_s, perf_acc) = results["baseline"], results["cpu-perf"]
+    print(f"CPU perf mode speedup: {base_s / perf_s:.2f}x, accuracy delta: {perf_acc - base_acc:+.4f}")
+
+
+def run_streaming(args, use_bf16=False):
+    """Train and evaluate from JSONL shards streamed lazily, split by text hash"""
+    cache = TokenCache(args.model_name, MAX_LENGTH, cache_dir=args.cache_dir)
+    tokenizer = cache.load_tokenizer()
+    collate_fn = partial(tokenizer.pad, padding="longest", return_tensors="pt")
+
+    def loader(split):
+        dataset = StreamingLeadDataset(args.data_file, cache.tokenizer_path, split=split, max_length=MAX_LENGTH,
+                                       shuffle_size=args.shuffle_buffer)
+        return DataLoader(dataset, batch_size=args.batch_size, collate_fn=collate_fn,
+                          num_workers=args.loader_workers, persistent_workers=False)
+
+    model = AutoModelForSequenceClassification.from_pretrained(args.model_name, num_labels=2)
+    model.to(device)
+    optimizer = AdamW(model.parameters(), lr=args.lr)
+
+    profiler = StepProfiler(parse_step_window(args.profile_steps), args.profile_dir) if args.profile_steps else None
+    train_model = torch.compile(model, dynamic=True) if args.compile else model
+    history = train_epochs(train_model, optimizer, loader("train"), args.epochs, profiler,
+                           accumulation_steps=args.grad_accum, use_bf16=use_bf16)
+    test_acc, _ = evaluate(train_model, loader("test"), use_bf16=use_bf16)
+    print(f"Test Accuracy: {test_acc:.4f}")
+
+    # Streaming never holds the full set of row hashes, so the checkpoint records none
+    path = save_checkpoint(model, tokenizer, optimizer, set(), root=args.checkpoint_root,
+                           base_model=args.model_name, parent=None, mode="streaming",
+                           train_rows=history[-1]["samples"] if history else 0, test_accuracy=test_acc)
+    print(f"Saved checkpoint to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fine-tune bge-small-en as a lead classifier")
+    parser.add_argument("--model-name", default=MODEL_NAME)
+    parser.add_argument("--data-file", default=DATA_FILE)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--lr", type=float, default=2e-5)
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="Jaccard similarity above which rows count as near-duplicates (0 keeps everything)")
+    parser.add_argument("--fixed-padding", action="store_true",
+                        help="Pad every example to max_length (old behaviour) instead of per batch")
+    parser.add_argument("--group-by-length", action="store_true",
+                        help="Batch examples of similar token length together (dynamic padding only)")
+    parser.add_argument("--compare-padding", action="store_true",
+                        help="Benchmark tokens/sec with and without dynamic padding, then exit")
+    parser.add_argument("--compare-batches", type=int, default=20,
+                        help="Number of test batches used by --compare-padding")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help="Directory of the on-disk tokenization cache")
+    parser.add_argument("--checkpoint-root", default=CHECKPOINT_ROOT,
+                        help="Directory holding versioned checkpoints (v0001, v0002, ... and LATEST)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Warm-start from the latest checkpoint and train only on rows it hasn't seen")
+    parser.add_argument("--incremental-epochs", type=int, default=1)
+    parser.add_argument("--replay-ratio", type=float, default=1.0,
+                        help="Previously seen rows replayed per new row in --incremental mode")
+    parser.add_argument("--reviewed-files", nargs="*", default=REVIEWED_FILES,
+                        help="GUI label files merged in by --incremental")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Stream --data-file (a path or glob of JSONL shards) instead of loading it into memory")
+    parser.add_argument("--shuffle-buffer", type=int, default=10000,
+                        help="Rows held in the streaming shuffle buffer")
+    parser.add_argument("--loader-workers", type=int, default=2,
+                        help="DataLoader worker processes that read and tokenize in --streaming mode")
+    parser.add_argument("--bf16", action="store_true",
+                        help="bf16 autocast for forward passes (ignored if the CPU lacks native bf16)")
+    parser.add_argument("--grad-accum", type=int, default=1,
+                        help="Batches whose gradients are accumulated per optimizer step")
+    parser.add_argument("--intra-op-threads", type=int, default=None)
+    parser.add_argument("--inter-op-threads", type=int, default=None)
+    parser.add_argument("--compile", action="store_true", help="Train through torch.compile(model)")
+    parser.add_argument("--compare-cpu-modes", action="store_true",
+                        help="Train the plain fp32 loop and the --bf16/--grad-accum/--compile mode, report the "
+                             "speedup and accuracy delta, then exit")
+    parser.add_argument("--profile-steps", default=None, metavar="START:END",
+                        help="Record a torch profiler trace for this window of training steps")
+    parser.add_argument("--profile-dir", default="./profiles")
+    parser.add_argument("--frozen-encoder", action="store_true",
+                        help="Fast mode: keep the encoder frozen and train only a head on stored embeddings")
+    parser.add_argument("--embedding-dir", default=EMBEDDING_DIR,
+                        help="Directory of the on-disk embedding store used by --frozen-encoder")
+    parser.add_argument("--head-epochs", type=int, default=300)
+    parser.add_argument("--head-lr", type=float, default=1e-2)
+    args = parser.parse_args()
+    if args.streaming and (args.incremental or args.frozen_encoder or args.compare_padding):
+        parser.error("--streaming can't be combined with --incremental, --frozen-encoder or --compare-padding")
+    if args.frozen_encoder and args.incremental:
+        # The head trains in seconds, so it is always fit on the full train split
+        parser.error("--frozen-encoder can't be combined with --incremental")
+    return args
+
+
+def main():
+    args = parse_args()
+    dynamic_padding = not args.fixed_padding
+
+    # CPU tuning has to happen before torch runs any parallel work
+    intra, inter = configure_threads(args.intra_op_threads, args.inter_op_threads)
+    use_bf16 = args.bf16 and bf16_supported()
+    if args.bf16 and not use_bf16:
+        print("This CPU has no native bf16 support, training in fp32")
+    print(f"Threads: {intra} intra-op, {inter} inter-op; bf16 autocast: {use_bf16}; "
+          f"effective batch size: {args.batch_size * args.grad_accum}")
+    if args.streaming:
+        run_streaming(args, use_bf16)
+        return
+
+    startup_start = time.perf_counter()
+
+    # Load dataset
+    dataset, train_split, test_split = load_splits(args.data_file, args.dedup_threshold)
+
+    # Incremental mode: train on rows the latest checkpoint hasn't seen, plus a replay sample
+    previous = latest_checkpoint(args.checkpoint_root) if args.incremental else None
+    if args.incremental and previous is None:
+        print(f"No checkpoint in {args.checkpoint_root} yet, running a full training instead")
+    if previous and load_manifest(previous).get("mode") == "frozen-encoder":
+        # Its encoder is the untouched base model and its head doesn't fit a *ForSequenceClassification
+        print(f"{previous} only trained a head on a frozen encoder, running a full training instead")
+        previous = None
+    if previous:
+        seen_keys = load_seen_keys(previous)
+        pool = [{"text": t, "label": l} for t, l in zip(dataset["text"], dataset["label"])]
+        pool += load_reviewed_rows(args.reviewed_files)
+        # Checkpoints from before the hash split may have trained on some of today's test rows
+        test_keys = {text_key(text) for text in test_split["text"]}
+        test_split = test_split.filter(lambda row: text_key(row["text"]) not in seen_keys)
+        new_rows, replay, new_keys = select_incremental_rows(pool, seen_keys, test_keys, args.replay_ratio)
+        print(f"Incremental from {previous}: {len(new_rows)} new rows, {len(replay)} replayed")
+        if not new_rows:
+            print("Nothing new to train on")
+            return
+        train_split = Dataset.from_list(new_rows + replay)
+        seen_keys |= new_keys
+    else:
+        seen_keys = {text_key(text) for text in train_split["text"]}
+
+    # Load tokenizer (kept locally by the token cache) and tokenize only texts not cached yet
+    cache = TokenCache(args.model_name, MAX_LENGTH, cache_dir=args.cache_dir)
+    tokenizer = cache.load_tokenizer()
+    train_dataset, train_new = prepare_dataset(train_split, cache)
+    test_dataset, test_new = prepare_dataset(test_split, cache)
+    cached = len(train_dataset) + len(test_dataset) - train_new - test_new
+    print(f"Startup (tokenizer + tokenization): {time.perf_counter() - startup_start:.2f}s — "
+          f"{cached} rows from cache, {train_new + test_new} newly tokenized")
+
+    if args.frozen_encoder:
+        run_frozen_encoder(args, train_split, test_split, cache, seen_keys)
+        return
+
+    # Load model (warm-started from the previous checkpoint in incremental mode)
+    model = AutoModelForSequenceClassification.from_pretrained(previous or args.model_name, num_labels=2)
+    model.to(device)
+
+    if args.compare_padding:
+        compare_padding(model, tokenizer, test_dataset, args.batch_size, args.compare_batches)
+        return
+
+    # DataLoaders
+    train_dataloader = make_dataloader(train_dataset, tokenizer, args.batch_size, shuffle=True,
+                                       dynamic_padding=dynamic_padding, group_by_length=args.group_by_length)
+    test_dataloader = make_dataloader(test_dataset, tokenizer, args.batch_size,
+                                      dynamic_padding=dynamic_padding, group_by_length=args.group_by_length)
+
+    # Quick sanity check batch shapes
+    ts = next(iter(train_dataloader))
+    print(f"Batch size: {len(ts['input_ids'])}")
+    print(f"Input IDs shape: {ts['input_ids'].shape}")
+    print(f"Attention mask shape: {ts['attention_mask'].shape}")
+    print(f"Labels shape: {ts['label'].shape}")
+
+    if args.compare_cpu_modes:
+        compare_cpu_modes(args, previous or args.model_name, train_dataloader, test_dataloader, use_bf16)
+        return
+
+    # Optimizer (resuming its moments when warm-starting)
+    optimizer = AdamW(model.parameters(), lr=args.lr)
+    if previous:
+        optimizer.load_state_dict(load_training_state(previous)["optimizer"])
 
-        total_loss += loss.item()
-        preds = torch.argmax(logits, dim=1)
-        correct += (preds == labels).sum().item()
-        total += labels.size(0)
+    # Training loop
+    num_epochs = args.incremental_epochs if previous else args.epochs
+    profiler = StepProfiler(parse_step_window(args.profile_steps), args.profile_dir) if args.profile_steps else None
+    train_model = torch.compile(model, dynamic=True) if args.compile else model
+    train_epochs(train_model, optimizer, train_dataloader, num_epochs, profiler,
+                 accumulation_steps=args.grad_accum, use_bf16=use_bf16)
 
-    avg_loss = total_loss / len(train_dataloader)
-    acc = correct / total
-    print(f"Epoch {epoch+1} — Loss: {avg_loss:.4f}, Accuracy: {acc:.4f}")
+    # Evaluation
+    test_acc, test_outputs = evaluate(train_model, test_dataloader, use_bf16=use_bf16)
+    print(f"Test Accuracy: {test_acc:.4f}")
 
-# Evaluation
-model.eval()
-correct = 0
-total = 0
+    # Save a versioned checkpoint for score_leads.py and later incremental runs
+    path = save_checkpoint(model, tokenizer, optimizer, seen_keys, root=args.checkpoint_root,
+                           base_model=args.model_name, parent=previous, mode="incremental" if previous else "full",
+                           train_rows=len(train_dataset), test_accuracy=test_acc)
+    print(f"Saved checkpoint to {path}")
 
-with torch.no_grad():
-    for batch in test_dataloader:
-        input_ids = batch["input_ids"].to(device)
-        attention_mask = batch["attention_mask"].to(device)
-        labels = batch["label"].to(device)
+    # Keep the test logits so eval_metrics.py can sweep thresholds without rerunning the model
+    split_texts = list(test_split["text"])
+    test_texts = [split_texts[i] for i in test_outputs["idx"].tolist()]
+    save_eval_logits(os.path.join(path, LOGITS_FILE), [text_key(text).hex() for text in test_texts], test_texts,
+                     test_outputs["logits"], test_outputs["labels"])
 
-        outputs = model(input_ids=input_ids, attention_mask=attention_mask)
-        preds = torch.argmax(outputs.logits, dim=1)
-        correct += (preds == labels).sum().item()
-        total += labels.size(0)
 
-print(f"Test Accuracy: {correct / total:.4f}")
+if __name__ == "__main__":
+    main()
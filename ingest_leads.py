@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import re
+import time
+
+from review_journal import atomic_write
+
+OUTPUT_FILE = "leads.jsonl"
+STATE_FILE = "ingest_state.json"
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def format_lead(doc):
+    """Training text for one exported lead, following beautify-leads.js; None if it has no content.
+
+    Reddit leads are "[REDDIT] title content", everything else "[PLATFORM] content"
+    (falling back to the title), with whitespace collapsed.
+    """
+    platform = (doc.get("platform") or "unknown").upper()
+    title = doc.get("title") or ""
+    content = doc.get("content") or ""
+    if platform == "REDDIT":
+        text = f"[{platform}] {title} {content}" if content.strip() else f"[{platform}] {title}"
+    else:
+        text = f"[{platform}] {content or title}"
+    text = WHITESPACE_RE.sub(" ", text).strip()
+    # More than just "[PLATFORM]"
+    return text if len(text) > len(platform) + 3 else None
+
+
+def id_key(value):
+    """Comparable, JSON-storable form of a Mongo _id, keeping its type so it can be queried again:
+    ObjectIds (and their {"$oid": ...} exports) as hex strings, integer ids as ints"""
+    if isinstance(value, dict):
+        if "$oid" in value:
+            return value["$oid"]
+        for wrapper in ("$numberInt", "$numberLong"):
+            if wrapper in value:
+                return int(value[wrapper])
+    if value is None or (isinstance(value, (int, float, str)) and not isinstance(value, bool)):
+        return value
+    return str(value)
+
+
+def after(key, mark):
+    """Whether _id key sorts after mark, in Mongo's order: numbers before strings (and hex ObjectIds)"""
+    if mark is None:
+        return True
+    if key is None:
+        return False
+    return (isinstance(key, str), key) > (isinstance(mark, str), mark)
+
+
+def iter_json_array(f, chunk_size=1 << 16):
+    """Yield the elements of a top-level JSON array (the leads.json export) without loading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size).lstrip()
+    while not buffer:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        buffer = chunk.lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("Export is not a JSON array")
+    pos = 1
+    eof = False
+    while True:
+        # Skip whitespace and the separator before the next element
+        while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ","):
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        # Elements are objects, so one that decodes before the end of the buffer is complete
+        if pos < len(buffer):
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                if end < len(buffer) or eof:
+                    yield element
+                    pos = end
+                    continue
+        if eof:
+            raise ValueError("Unexpected end of JSON array")
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def read_export(path):
+    """Stream lead documents from a leads.json array export or a JSONL (mongoexport) file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from iter_json_array(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def read_collection(collection, mark=None, batch_size=1000):
+    """Stream lead documents with _id above mark from a pymongo (or mongomock) collection, in _id order"""
+    query = {}
+    if mark is not None:
+        try:
+            from bson import ObjectId
+            mark = ObjectId(mark) if ObjectId.is_valid(mark) else mark
+        except ImportError:
+            pass
+        query = {"_id": {"$gt": mark}}
+    return collection.find(query).sort("_id", 1).batch_size(batch_size)
+
+
+class Ingester:
+    """Appends newly exported leads to leads.jsonl, remembering a high-water mark of _id.
+
+    The state file records the highest _id ingested and the size leads.jsonl had
+    after that batch was fsynced; a run first truncates leads.jsonl back to that
+    size, so a crash between writing leads and saving the state never duplicates
+    them. Documents are ingested only if their _id is above the mark the run
+    started from.
+    """
+
+    def __init__(self, output=OUTPUT_FILE, state_path=STATE_FILE):
+        self.output = output
+        self.state_path = state_path
+        self.high_water_mark = None
+        self.committed_size = 0
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.high_water_mark = state["high_water_mark"]
+            self.committed_size = state["committed_size"]
+        # Without a state file (e.g. leads.jsonl came from beautify-leads.js) the first run rewrites the output
+
+    def reset(self):
+        """Forget the high-water mark and rewrite leads.jsonl from scratch on the next ingest"""
+        self.high_water_mark = None
+        self.committed_size = 0
+
+    def is_new(self, doc, mark):
+        # Without a mark every document is new, including ones whose _id can't be tracked
+        return mark is None or after(id_key(doc.get("_id")), mark)
+
+    def ingest(self, docs, batch_size=1000, ordered=False):
+        """Format and append the new documents; returns (appended, skipped as empty).
+
+        ordered says docs come in ascending _id order (read_collection), so every
+        batch can be committed as it is written; otherwise the run commits once.
+        """
+        appended = skipped = 0
+        with open(self.output, 'r+b' if os.path.exists(self.output) else 'wb') as out:
+            # Drop anything written after the last commit (a run that crashed before saving its state)
+            out.truncate(self.committed_size)
+            out.seek(self.committed_size)
+            # Compare against the mark this run started from: exports (get-leads.js) aren't in _id
+            # order, so the running max is only the starting point of the next run
+            start_mark = mark = self.high_water_mark
+            pending = 0
+            for doc in docs:
+                if not self.is_new(doc, start_mark):
+                    continue
+                key = id_key(doc.get("_id"))
+                if key is not None and after(key, mark):
+                    mark = key
+                text = format_lead(doc)
+                if text is None:
+                    skipped += 1
+                    continue
+                out.write((json.dumps({"text": text, "label": 1}) + '\n').encode('utf-8'))
+                appended += 1
+                pending += 1
+                # Unordered, a crash must roll back the whole run, or _ids below a saved mark would be lost
+                if pending >= batch_size and ordered:
+                    self._commit(out, mark)
+                    pending = 0
+            self._commit(out, mark)
+        return appended, skipped
+
+    def _commit(self, out, mark):
+        out.flush()
+        os.fsync(out.fileno())
+        self.high_water_mark = mark
+        self.committed_size = out.tell()
+        atomic_write(self.state_path, [json.dumps({"high_water_mark": mark, "committed_size": self.committed_size})])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append new leads from MongoDB or an export file to leads.jsonl")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--export", help="leads.json array export or JSONL export to read instead of MongoDB")
+    source.add_argument("--mongo-uri", default=os.environ.get("MONGODB_URI"), help="Default: $MONGODB_URI")
+    parser.add_argument("--db", default="edithunt")
+    parser.add_argument("--collection", default="leads")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--state", default=STATE_FILE, help="Where the _id high-water mark is kept")
+    parser.add_argument("--full", action="store_true", help="Ignore the high-water mark and rebuild the output")
+    args = parser.parse_args()
+
+    ingester = Ingester(args.output, args.state)
+    if args.full:
+        ingester.reset()
+
+    start = time.perf_counter()
+    if args.export:
+        appended, skipped = ingester.ingest(read_export(args.export))
+    else:
+        if not args.mongo_uri:
+            parser.error("pass --export or --mongo-uri (or set MONGODB_URI)")
+        from pymongo import MongoClient
+        client = MongoClient(args.mongo_uri)
+        try:
+            collection = client[args.db][args.collection]
+            appended, skipped = ingester.ingest(read_collection(collection, ingester.high_water_mark), ordered=True)
+        finally:
+            client.close()
+
+    print(f"Appended {appended} new leads to {args.output} ({skipped} skipped: insufficient text content) "
+          f"in {time.perf_counter() - start:.1f}s; high-water mark {ingester.high_water_mark}")
+
+
+if __name__ == "__main__":
+    main()
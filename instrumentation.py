@@ -0,0 +1,108 @@
+import os
+import time
+from collections import defaultdict
+
+import torch
+
+from resource_usage import peak_rss_mb
+
+PHASES = ["data", "forward", "backward", "optimizer"]
+
+
+class StepTimer:
+    """Accumulate wall time per training phase.
+
+    On CUDA the device is synchronized at each phase boundary so kernel time is
+    charged to the phase that launched it; on CPU every op is already synchronous.
+    """
+
+    def __init__(self, device):
+        self.cuda = device.type == "cuda"
+        self.totals = defaultdict(float)
+        self.steps = 0
+        self.samples = 0
+        self.tokens = 0
+        self._last = None
+
+    def start(self):
+        self._sync()
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        self._sync()
+        now = time.perf_counter()
+        self.totals[phase] += now - self._last
+        self._last = now
+
+    def count(self, samples, tokens):
+        self.steps += 1
+        self.samples += samples
+        self.tokens += tokens
+
+    def _sync(self):
+        if self.cuda:
+            torch.cuda.synchronize()
+
+    def summary(self):
+        elapsed = sum(self.totals.values())
+        return {
+            "steps": self.steps,
+            "samples": self.samples,
+            "seconds": elapsed,
+            "samples_per_sec": self.samples / elapsed if elapsed else 0.0,
+            "tokens_per_sec": self.tokens / elapsed if elapsed else 0.0,
+            "ms_per_step": {phase: 1000 * self.totals[phase] / max(self.steps, 1) for phase in PHASES},
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def format_summary(summary):
+    phases = ", ".join(f"{phase} {ms:.1f}ms" for phase, ms in summary["ms_per_step"].items())
+    rss = f", peak RSS {summary['peak_rss_mb']:.0f}MB" if summary["peak_rss_mb"] is not None else ""
+    return (f"{summary['samples_per_sec']:.1f} samples/sec, {summary['tokens_per_sec']:.1f} tokens/sec, "
+            f"per step: {phases}{rss}")
+
+
+def parse_step_window(spec):
+    """"START:END" -> (start, end) step range for the profiler, or None"""
+    if not spec:
+        return None
+    start, end = spec.split(":")
+    return int(start), int(end)
+
+
+class StepProfiler:
+    """torch.profiler over a window of global training steps, exported as a Chrome trace"""
+
+    def __init__(self, window, output_dir):
+        self.window = window
+        self.output_dir = output_dir
+        self.profiler = None
+
+    def step(self, global_step):
+        if self.window is None:
+            return
+        start, end = self.window
+        if global_step == start and self.profiler is None:
+            self.profiler = torch.profiler.profile(
+                activities=[torch.profiler.ProfilerActivity.CPU]
+                + ([torch.profiler.ProfilerActivity.CUDA] if torch.cuda.is_available() else []),
+                record_shapes=True,
+                profile_memory=True,
+            )
+            self.profiler.__enter__()
+        elif global_step == end and self.profiler is not None:
+            self.stop()
+
+    def stop(self):
+        if self.profiler is None:
+            return
+        self.profiler.__exit__(None, None, None)
+        os.makedirs(self.output_dir, exist_ok=True)
+        start, end = self.window
+        path = os.path.join(self.output_dir, f"trace_steps_{start}_{end}.json")
+        self.profiler.export_chrome_trace(path)
+        print(f"Wrote profiler trace to {path}")
+        print(self.profiler.key_averages().table(sort_by="self_cpu_time_total", row_limit=15))
+        self.profiler = None
+        self.window = None
@@ -0,0 +1,86 @@
+import base64
+import hashlib
+import json
+import re
+import unicodedata
+
+ID_BYTES = 8
+
+
+def normalize_text(text):
+    """Canonical form of a lead's text: NFC, whitespace collapsed, trimmed"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def lead_id(text):
+    """Stable content hash of a lead, independent of its position in leads.jsonl"""
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=ID_BYTES).hexdigest()
+
+
+def pack_ids(ids):
+    """Encode a set of lead ids as base64 of their sorted, concatenated raw bytes (8 bytes per id)"""
+    return base64.b64encode(b"".join(sorted(bytes.fromhex(key) for key in ids))).decode("ascii")
+
+
+def unpack_ids(packed):
+    data = base64.b64decode(packed)
+    return {data[i:i + ID_BYTES].hex() for i in range(0, len(data), ID_BYTES)}
+
+
+class LabelStore:
+    """Labeled leads keyed by lead_id, with O(1) classify, reclassify and delete.
+
+    A single insertion-ordered dict holds every labeled lead; a lead moves to the
+    end when its label changes, which matches appending it to the other list.
+    Exports walk the dict once per label in that order.
+    """
+
+    def __init__(self):
+        self.leads = {}
+        self.counts = {0: 0, 1: 0}
+
+    def __len__(self):
+        return len(self.leads)
+
+    def __contains__(self, key):
+        return key in self.leads
+
+    def label_of(self, key):
+        lead = self.leads.get(key)
+        return None if lead is None else lead['label']
+
+    def set_label(self, lead, label, key=None):
+        """Label a lead (a dict with 'text'); returns its id"""
+        key = key or lead_id(lead['text'])
+        previous = self.leads.get(key)
+        if previous is not None:
+            if previous['label'] == label:
+                return key
+            self.remove(key)
+        lead = dict(lead)
+        lead['label'] = label
+        self.leads[key] = lead
+        self.counts[label] += 1
+        return key
+
+    def remove(self, key):
+        lead = self.leads.pop(key, None)
+        if lead is not None:
+            self.counts[lead['label']] -= 1
+        return lead
+
+    def with_label(self, label):
+        """Leads carrying label, in the order they were (last) labeled"""
+        return [lead for lead in self.leads.values() if lead['label'] == label]
+
+    def load_jsonl(self, path, label=None):
+        """Add the leads of a JSONL export; label overrides the label stored on each line"""
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    lead = json.loads(line)
+                    self.set_label(lead, lead['label'] if label is None else label)
+
+    def jsonl_lines(self, label):
+        """Export lines for one label, as written to classified_leads.jsonl / nonleads.jsonl"""
+        return (json.dumps(lead) + '\n' for lead in self.with_label(label))
@@ -1,27 +1,32 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import json
-import os
+import argparse
+
+from highlighter import KeywordHighlighter, load_rules, tk_offsets
+from review_engine import FALSE_FILE, SESSION_FILE, TRUE_FILE, ReviewEngine
 
 class LeadClassifierGUI:
-    def __init__(self, root):
+    """Tk view over a ReviewEngine: renders its state and forwards keys and buttons to it"""
+    
+    def __init__(self, root, assist_checkpoint=None, skip_done=True):
         self.root = root
-        self.root.title("Lead Classifier - Manual Review [1=Job, 0=NotJob, Del=Delete, ←→=Navigate]")
+        self.skip_done = skip_done
+        self.root.title("Lead Classifier - Manual Review [1=Job, 0=NotJob, Del=Delete, ←→=Navigate, Enter=Accept suggestion]")
         self.root.geometry("1000x700")
         
-        # Data storage
-        self.leads = []
-        self.current_index = 0
-        self.true_leads = []  # Confirmed job opportunities (label=1)
-        self.false_leads = []  # Not job opportunities (label=0)
-        self.deleted_leads = set()  # Track deleted/removed leads (by index)
-        self.reviewed_indices = set()  # Track which leads have been reviewed
+        # Review state lives in the engine
+        self.engine = None
+        self.suggestion = None  # (label, probability of label 1) for the displayed lead
+        self.neighbour_count = 20
         
         # Auto-save functionality
         self.auto_save_timer = None
         self.auto_save_delay = 10000  # 10 seconds in milliseconds
         self.last_save_status = ""
         
+        # Keyword highlighting rules (highlight_rules.json)
+        self.highlighter = KeywordHighlighter(load_rules())
+        
         # Load data
         self.load_leads()
         
@@ -31,22 +36,24 @@ class LeadClassifierGUI:
         # Setup GUI
         self.setup_gui()
         
+        if assist_checkpoint:
+            self.start_review_queue(assist_checkpoint)
+        
         # Display first lead
-        if self.leads:
+        if self.engine.leads:
             self.display_current_lead()
     
     def load_leads(self):
-        """Load leads from leads.jsonl file"""
+        """Open leads.jsonl through a cached offset index; leads are decoded as they are displayed"""
         try:
-            with open('leads.jsonl', 'r', encoding='utf-8') as f:
-                for line in f:
-                    lead = json.loads(line.strip())
-                    self.leads.append(lead)
-            print(f"Loaded {len(self.leads)} leads")
+            self.engine = ReviewEngine(skip_done=self.skip_done)
+            print(f"Loaded {len(self.engine.leads)} leads")
         except FileNotFoundError:
+            self.engine = ReviewEngine(leads=[])
             messagebox.showerror("Error", "leads.jsonl file not found!")
             self.root.quit()
         except Exception as e:
+            self.engine = ReviewEngine(leads=[])
             messagebox.showerror("Error", f"Error loading leads: {str(e)}")
             self.root.quit()
     
@@ -77,7 +84,15 @@ class LeadClassifierGUI:
         ttk.Label(nav_frame, text="Go to lead:").pack(side=tk.LEFT, padx=(0, 5))
         self.jump_entry = ttk.Entry(nav_frame, width=10)
         self.jump_entry.pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(nav_frame, text="Go", command=self.jump_to_lead).pack(side=tk.LEFT)
+        ttk.Button(nav_frame, text="Go", command=self.jump_to_lead).pack(side=tk.LEFT, padx=(0, 20))
+        
+        # Search, e.g. thumbnail platform:reddit -"for hire" label:unlabeled
+        ttk.Label(nav_frame, text="Search:").pack(side=tk.LEFT, padx=(0, 5))
+        self.search_entry = ttk.Entry(nav_frame, width=30)
+        self.search_entry.pack(side=tk.LEFT, padx=(0, 5))
+        self.search_entry.bind('<Return>', self.run_search)
+        ttk.Button(nav_frame, text="Search", command=self.run_search).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(nav_frame, text="Clear", command=self.clear_search).pack(side=tk.LEFT)
         
         # Lead content display
         content_frame = ttk.LabelFrame(main_frame, text="Lead Content", padding="10")
@@ -94,8 +109,8 @@ class LeadClassifierGUI:
         self.content_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         # Configure text highlighting tags
-        self.content_text.tag_config("green_highlight", background="#90EE90", foreground="black")  # Light green
-        self.content_text.tag_config("red_highlight", background="#FFB6C1", foreground="black")    # Light red
+        for rule in self.highlighter.rules:
+            self.content_text.tag_config(rule["tag"], background=rule.get("background"), foreground=rule.get("foreground"))
         
         # Classification buttons frame
         button_frame = ttk.Frame(main_frame)
@@ -121,7 +136,13 @@ class LeadClassifierGUI:
             text="🗑️ DELETE (Remove duplicate/unwanted)", 
             command=self.delete_lead
         )
-        self.delete_button.pack(side=tk.LEFT, padx=(10, 0), ipadx=15, ipady=10)
+        self.delete_button.pack(side=tk.LEFT, padx=(10, 10), ipadx=15, ipady=10)
+        
+        ttk.Button(
+            button_frame, 
+            text="≈ SIMILAR LEADS (Label a group)", 
+            command=self.show_similar_leads
+        ).pack(side=tk.LEFT, padx=(10, 0), ipadx=15, ipady=10)
         
         # Statistics frame
         stats_frame = ttk.LabelFrame(main_frame, text="Statistics", padding="10")
@@ -143,40 +164,45 @@ class LeadClassifierGUI:
         self.auto_save_label.pack(side=tk.LEFT, padx=(20, 0))
         
         # Keyboard bindings
-        self.root.bind('<Key-1>', lambda e: self.classify_as_true())
-        self.root.bind('<Key-0>', lambda e: self.classify_as_false())
-        self.root.bind('<Delete>', lambda e: self.delete_lead())
-        self.root.bind('<Left>', lambda e: self.previous_lead())
-        self.root.bind('<Right>', lambda e: self.next_lead())
+        # (ignored while typing in the search / go-to boxes)
+        self.root.bind('<Key-1>', self.shortcut(self.classify_as_true))
+        self.root.bind('<Key-0>', self.shortcut(self.classify_as_false))
+        self.root.bind('<Delete>', self.shortcut(self.delete_lead))
+        self.root.bind('<Left>', self.shortcut(self.previous_lead))
+        self.root.bind('<Right>', self.shortcut(self.next_lead))
+        self.root.bind('<Return>', self.shortcut(self.accept_suggestion))
         self.root.focus_set()  # Enable keyboard events
         
         # Start auto-save timer
         self.reset_auto_save_timer()
     
+    def shortcut(self, action):
+        def handler(event):
+            if not isinstance(event.widget, tk.Entry):
+                action()
+        return handler
+    
     def display_current_lead(self):
         """Display the current lead"""
-        if not self.leads or self.current_index >= len(self.leads):
+        engine = self.engine
+        if not engine.has_lead():
             return
         
-        lead = self.leads[self.current_index]
-        
-        # Mark lead as reviewed just by viewing it (unless it's deleted)
-        was_new = self.current_index not in self.reviewed_indices
-        if self.current_index not in self.deleted_leads:
-            self.reviewed_indices.add(self.current_index)
+        # Viewing a lead marks it as reviewed (unless it's deleted)
+        lead, deleted, was_new = engine.view()
         
         # Update progress
-        reviewed_count = len(self.reviewed_indices)
-        deleted_count = len(self.deleted_leads)
-        remaining_count = len(self.leads) - reviewed_count - deleted_count
+        reviewed_count, deleted_count, remaining_count = engine.progress()
         
         # Show if current lead is deleted
-        status = "DELETED" if self.current_index in self.deleted_leads else "REVIEWED"
+        status = "DELETED" if deleted else "REVIEWED"
         
         self.progress_label.config(
-            text=f"Lead {self.current_index + 1} of {len(self.leads)} | "
+            text=f"{self.search_text()}"
+                 f"Lead {engine.current_index + 1} of {len(engine.leads)} | "
                  f"Reviewed: {reviewed_count} | Deleted: {deleted_count} | "
                  f"Remaining: {remaining_count}"
+                 f"{self.suggestion_text()}"
         )
         
         # Display content
@@ -187,7 +213,7 @@ class LeadClassifierGUI:
         self.highlight_keywords()
         
         # Color coding: red for deleted, blue for reviewed
-        if self.current_index in self.deleted_leads:
+        if deleted:
             self.content_text.config(bg="#ffe6e6")  # Light red background for deleted
         else:
             self.content_text.config(bg="#f0f8ff")  # Light blue background for reviewed
@@ -196,112 +222,60 @@ class LeadClassifierGUI:
         self.update_stats()
         
         # Update button states
-        self.root.title(f"Lead Classifier - Lead {self.current_index + 1}/{len(self.leads)} - {status}")
+        self.root.title(f"Lead Classifier - Lead {engine.current_index + 1}/{len(engine.leads)} - {status}")
         
         # Reset auto-save timer if this is a new view
         if was_new:
             self.reset_auto_save_timer()
     
     def highlight_keywords(self):
-        """Highlight specific keywords in the text"""
-        # Define keywords to highlight
-        green_keywords = ["video editor", "hiring"]
-        red_keywords = ["for hire"]
-        
-        # Get all text content
-        text_content = self.content_text.get(1.0, tk.END).lower()
+        """Highlight configured keywords: one regex pass over the text, then one tag_add per tag"""
+        text_content = self.content_text.get(1.0, tk.END)
+        spans = self.highlighter.spans(text_content)
         
         # Clear existing highlighting tags
-        self.content_text.tag_remove("green_highlight", 1.0, tk.END)
-        self.content_text.tag_remove("red_highlight", 1.0, tk.END)
-        
-        # Highlight green keywords
-        for keyword in green_keywords:
-            start_pos = 1.0
-            while True:
-                pos = self.content_text.search(keyword, start_pos, tk.END, nocase=True)
-                if not pos:
-                    break
-                end_pos = f"{pos}+{len(keyword)}c"
-                self.content_text.tag_add("green_highlight", pos, end_pos)
-                start_pos = end_pos
-        
-        # Highlight red keywords
-        for keyword in red_keywords:
-            start_pos = 1.0
-            while True:
-                pos = self.content_text.search(keyword, start_pos, tk.END, nocase=True)
-                if not pos:
-                    break
-                end_pos = f"{pos}+{len(keyword)}c"
-                self.content_text.tag_add("red_highlight", pos, end_pos)
-                start_pos = end_pos
+        for tag in spans:
+            self.content_text.tag_remove(tag, 1.0, tk.END)
+        
+        for tag, ranges in spans.items():
+            if not ranges:
+                continue
+            offsets = [offset for span in ranges for offset in span]
+            if tk.TkVersion < 8.7:
+                offsets = tk_offsets(text_content, offsets)
+            self.content_text.tag_add(tag, *(f"1.0+{offset}c" for offset in offsets))
     
     def update_stats(self):
         """Update statistics display"""
-        true_count = len(self.true_leads)
-        false_count = len(self.false_leads)
-        deleted_count = len(self.deleted_leads)
-        total_reviewed = len(self.reviewed_indices)
-        
+        engine = self.engine
         stats_text = (
-            f"Job Opportunities: {true_count} | "
-            f"Non-Jobs: {false_count} | "
-            f"Deleted: {deleted_count} | "
-            f"Reviewed: {total_reviewed}"
+            f"Job Opportunities: {engine.labels.counts[1]} | "
+            f"Non-Jobs: {engine.labels.counts[0]} | "
+            f"Deleted: {len(engine.deleted_ids)} | "
+            f"Reviewed: {len(engine.reviewed_ids)} | "
+            f"Labeled this session: {engine.session_labeled} ({engine.labels_per_hour():.0f}/hr)"
         )
         self.stats_label.config(text=stats_text)
     
     def classify_as_true(self):
         """Classify current lead as a real job opportunity"""
-        if self.current_index < len(self.leads):
-            lead = self.leads[self.current_index].copy()
-            lead['label'] = 1
-            
-            # Remove from false_leads if it was there
-            self.false_leads = [l for l in self.false_leads if l['text'] != lead['text']]
-            
-            # Add to true_leads if not already there
-            if not any(l['text'] == lead['text'] for l in self.true_leads):
-                self.true_leads.append(lead)
-            
-            self.reviewed_indices.add(self.current_index)
-            self.reset_auto_save_timer()
-            self.next_lead()
+        self.classify(1)
     
     def classify_as_false(self):
         """Classify current lead as not a job opportunity"""
-        if self.current_index < len(self.leads):
-            lead = self.leads[self.current_index].copy()
-            lead['label'] = 0
-            
-            # Remove from true_leads if it was there
-            self.true_leads = [l for l in self.true_leads if l['text'] != lead['text']]
-            
-            # Add to false_leads if not already there
-            if not any(l['text'] == lead['text'] for l in self.false_leads):
-                self.false_leads.append(lead)
-            
-            self.reviewed_indices.add(self.current_index)
-            self.reset_auto_save_timer()
-            self.next_lead()
+        self.classify(0)
+    
+    def classify(self, label):
+        if not self.engine.has_lead():
+            return
+        self.reset_auto_save_timer()
+        self.show_move(self.engine.classify(label))
     
     def delete_lead(self):
         """Delete/remove current lead (will not be saved to either file)"""
-        if not self.leads or self.current_index >= len(self.leads):
+        if not self.engine.delete():
             return
         
-        # Mark as deleted
-        self.deleted_leads.add(self.current_index)
-        
-        # Remove from reviewed status since it's deleted
-        self.reviewed_indices.discard(self.current_index)
-        
-        # Remove from both true_leads and false_leads if it exists there
-        current_text = self.leads[self.current_index]['text']
-        self.true_leads = [l for l in self.true_leads if l['text'] != current_text]
-        self.false_leads = [l for l in self.false_leads if l['text'] != current_text]
-        
         # Update display
         self.display_current_lead()
         
@@ -309,34 +283,143 @@ class LeadClassifierGUI:
         self.next_lead()
         self.reset_auto_save_timer()
     
-    def previous_lead(self):
-        """Go to previous lead"""
-        if self.current_index > 0:
-            self.current_index -= 1
+    def start_review_queue(self, checkpoint):
+        """Score upcoming leads with the trained classifier in a background process"""
+        try:
+            self.engine.start_review_queue(checkpoint)
+        except Exception as e:
+            messagebox.showerror("Error", f"Model-assisted review unavailable: {str(e)}")
+            return
+        self.poll_review_queue()
+    
+    def poll_review_queue(self):
+        """Pick up finished scores without blocking the Tk main loop"""
+        if self.engine.review_queue is None:
+            return
+        scored = self.engine.review_queue.poll()
+        if scored and self.suggestion is None and self.engine.suggestion():
+            self.display_current_lead()
+        self.root.after(200, self.poll_review_queue)
+    
+    def suggestion_text(self):
+        self.suggestion = self.engine.suggestion()
+        if self.engine.review_queue is None:
+            return ""
+        if self.suggestion is None:
+            return " | Model: scoring..."
+        label, score = self.suggestion
+        return f" | Model suggests: {'JOB' if label else 'NOT JOB'} (p={score:.2f}, Enter to accept)"
+    
+    def accept_suggestion(self):
+        """Apply the model's suggested label to the current lead"""
+        if self.suggestion is not None:
+            self.classify(self.suggestion[0])
+    
+    def run_search(self, event=None):
+        """Restrict navigation to the leads matching the search box"""
+        query = self.search_entry.get().strip()
+        if not query:
+            self.clear_search()
+            return "break"
+        try:
+            found = self.engine.search(query)
+        except Exception as e:
+            messagebox.showerror("Error", f"Search failed: {str(e)}")
+            return "break"
+        if not found:
+            messagebox.showinfo("Info", f"No leads match {query!r}")
+            return "break"
+        self.root.focus_set()  # Give the keyboard shortcuts back to the window
+        self.display_current_lead()
+        return "break"
+    
+    def clear_search(self):
+        self.engine.clear_search()
+        self.search_entry.delete(0, tk.END)
+        self.display_current_lead()
+    
+    def search_text(self):
+        engine = self.engine
+        if engine.search_results is None:
+            return ""
+        return f"Result {engine.search_pos + 1}/{len(engine.search_results)} for {engine.search_query!r} | "
+    
+    def show_similar_leads(self):
+        """List the nearest unlabeled neighbours of the current lead and label a selection of them at once"""
+        if not self.engine.has_lead():
+            return
+        try:
+            neighbours = self.engine.similar(self.neighbour_count)
+        except Exception as e:
+            messagebox.showerror("Error", f"Similar leads unavailable: {str(e)}")
+            return
+        if not neighbours:
+            messagebox.showinfo("Info", "No unlabeled leads are similar to this one.")
+            return
+        
+        engine = self.engine
+        window = tk.Toplevel(self.root)
+        window.title(f"Leads similar to lead {engine.current_index + 1}")
+        window.geometry("900x450")
+        window.columnconfigure(0, weight=1)
+        window.rowconfigure(0, weight=1)
+        
+        listbox = tk.Listbox(window, selectmode=tk.EXTENDED, font=("Arial", 10))
+        listbox.grid(row=0, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), padx=10, pady=10)
+        for i, similarity in neighbours:
+            preview = " ".join(engine.leads[i]['text'].split())[:140]
+            listbox.insert(tk.END, f"{similarity:.3f}  #{i + 1}  {preview}")
+        listbox.select_set(0, tk.END)
+        
+        def apply(label):
+            selected = [neighbours[row][0] for row in listbox.curselection()]
+            for i in selected:
+                engine.label_lead(i, label)
+            window.destroy()
             self.reset_auto_save_timer()
             self.display_current_lead()
+        
+        ttk.Button(window, text="✓ Label selected as JOB (1)", command=lambda: apply(1)).grid(row=1, column=0, pady=(0, 10))
+        ttk.Button(window, text="✗ Label selected as NOT A JOB (0)", command=lambda: apply(0)).grid(row=1, column=1, pady=(0, 10))
+        ttk.Button(window, text="Cancel", command=window.destroy).grid(row=1, column=2, pady=(0, 10))
     
-    def next_lead(self):
-        """Go to next lead"""
-        if self.current_index < len(self.leads) - 1:
-            self.current_index += 1
+    def show_move(self, moved):
+        """Display the lead navigation landed on, or say why it couldn't move"""
+        if moved:
             self.reset_auto_save_timer()
             self.display_current_lead()
+        elif self.engine.search_results is not None:
+            messagebox.showinfo("Info", "You've reached the last search result!")
+        elif self.engine.skip_done:
+            messagebox.showinfo("Info", "No unreviewed leads after this one!")
         else:
             messagebox.showinfo("Info", "You've reached the last lead!")
     
+    def previous_lead(self):
+        """Go to previous lead (previous search result while filtering)"""
+        if self.engine.previous():
+            self.reset_auto_save_timer()
+            self.display_current_lead()
+    
+    def next_lead(self):
+        """Go to next lead (next search result while filtering, else the most uncertain
+        scored lead in model-assisted mode)"""
+        self.show_move(self.engine.next())
+    
     def jump_to_lead(self):
         """Jump to a specific lead number"""
         try:
             lead_num = int(self.jump_entry.get())
-            if 1 <= lead_num <= len(self.leads):
-                self.current_index = lead_num - 1
-                self.reset_auto_save_timer()
-                self.display_current_lead()
-            else:
-                messagebox.showerror("Error", f"Lead number must be between 1 and {len(self.leads)}")
         except ValueError:
             messagebox.showerror("Error", "Please enter a valid number")
+            return
+        try:
+            self.engine.jump(lead_num)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.reset_auto_save_timer()
+        self.display_current_lead()
     
     def reset_auto_save_timer(self):
         """Reset the auto-save timer"""
@@ -363,38 +446,20 @@ class LeadClassifierGUI:
             print(f"Auto-save error: {e}")
     
     def save_progress_silent(self):
-        """Save current progress to files silently"""
-        # Save true leads (job opportunities)
-        with open('classified_leads.jsonl', 'w', encoding='utf-8') as f:
-            for lead in self.true_leads:
-                f.write(json.dumps(lead) + '\n')
-        
-        # Save false leads (non-job opportunities)
-        with open('nonleads.jsonl', 'w', encoding='utf-8') as f:
-            for lead in self.false_leads:
-                f.write(json.dumps(lead) + '\n')
-        
-        # Save session state
-        session_data = {
-            'current_index': self.current_index,
-            'reviewed_indices': list(self.reviewed_indices),
-            'deleted_leads': list(self.deleted_leads),
-            'true_count': len(self.true_leads),
-            'false_count': len(self.false_leads)
-        }
-        with open('classifier_session.json', 'w', encoding='utf-8') as f:
-            json.dump(session_data, f, indent=2)
+        """Append events since the last save to the journal; compact once it has grown large"""
+        self.engine.autosave()
     
     def manual_save_progress(self):
         """Manually save progress with confirmation popup"""
+        engine = self.engine
         try:
-            self.save_progress_silent()
+            engine.compact()
             messagebox.showinfo("Success", 
                 f"Progress saved!\n"
-                f"• Job opportunities: {len(self.true_leads)} → classified_leads.jsonl\n"
-                f"• Non-jobs: {len(self.false_leads)} → nonleads.jsonl\n"
-                f"• Deleted leads: {len(self.deleted_leads)} (excluded from files)\n"
-                f"• Session state saved to classifier_session.json"
+                f"• Job opportunities: {engine.labels.counts[1]} → {TRUE_FILE}\n"
+                f"• Non-jobs: {engine.labels.counts[0]} → {FALSE_FILE}\n"
+                f"• Deleted leads: {len(engine.deleted_ids)} (excluded from files)\n"
+                f"• Session state saved to {SESSION_FILE}"
             )
             self.reset_auto_save_timer()  # Reset timer after manual save
         except Exception as e:
@@ -406,35 +471,16 @@ class LeadClassifierGUI:
     
     def load_previous_session(self):
         """Load previous classification session"""
+        engine = self.engine
         try:
-            if os.path.exists('classifier_session.json'):
-                with open('classifier_session.json', 'r', encoding='utf-8') as f:
-                    session_data = json.load(f)
-                
-                self.current_index = session_data.get('current_index', 0)
-                self.reviewed_indices = set(session_data.get('reviewed_indices', []))
-                self.deleted_leads = set(session_data.get('deleted_leads', []))
-                
-                # Load previously classified leads
-                if os.path.exists('classified_leads.jsonl'):
-                    self.true_leads = []
-                    with open('classified_leads.jsonl', 'r', encoding='utf-8') as f:
-                        for line in f:
-                            self.true_leads.append(json.loads(line.strip()))
-                
-                if os.path.exists('nonleads.jsonl'):
-                    self.false_leads = []
-                    with open('nonleads.jsonl', 'r', encoding='utf-8') as f:
-                        for line in f:
-                            self.false_leads.append(json.loads(line.strip()))
-                
+            if engine.load_session() is not None:
                 self.display_current_lead()
                 self.reset_auto_save_timer()  # Restart auto-save timer
                 messagebox.showinfo("Success", 
                     f"Previous session loaded successfully!\n"
-                    f"• Reviewed leads: {len(self.reviewed_indices)}\n"
-                    f"• Classified job opportunities: {len(self.true_leads)}\n"
-                    f"• Classified non-jobs: {len(self.false_leads)}"
+                    f"• Reviewed leads: {len(engine.reviewed_ids)}\n"
+                    f"• Classified job opportunities: {engine.labels.counts[1]}\n"
+                    f"• Classified non-jobs: {engine.labels.counts[0]}"
                 )
             else:
                 messagebox.showinfo("Info", "No previous session found.")
@@ -444,27 +490,10 @@ class LeadClassifierGUI:
     def load_session_silently(self):
         """Load previous session data silently without popup"""
         try:
-            if os.path.exists('classifier_session.json'):
-                with open('classifier_session.json', 'r', encoding='utf-8') as f:
-                    session_data = json.load(f)
-                
-                self.current_index = session_data.get('current_index', 0)
-                self.reviewed_indices = set(session_data.get('reviewed_indices', []))
-                
-                # Load previously classified leads
-                if os.path.exists('classified_leads.jsonl'):
-                    self.true_leads = []
-                    with open('classified_leads.jsonl', 'r', encoding='utf-8') as f:
-                        for line in f:
-                            self.true_leads.append(json.loads(line.strip()))
-                
-                if os.path.exists('nonleads.jsonl'):
-                    self.false_leads = []
-                    with open('nonleads.jsonl', 'r', encoding='utf-8') as f:
-                        for line in f:
-                            self.false_leads.append(json.loads(line.strip()))
-                
-                print(f"Session loaded silently: {len(self.reviewed_indices)} leads reviewed")
+            replayed = self.engine.load_session()
+            if replayed is not None:
+                print(f"Session loaded silently: {len(self.engine.reviewed_ids)} leads reviewed "
+                      f"({replayed} journaled events replayed)")
         except Exception as e:
             print(f"Could not load previous session: {e}")
     
@@ -473,13 +502,21 @@ class LeadClassifierGUI:
         # Cancel auto-save timer
         if self.auto_save_timer:
             self.root.after_cancel(self.auto_save_timer)
+        self.engine.close()
         
         self.manual_save_progress()
         self.root.quit()
 
 def main():
+    parser = argparse.ArgumentParser(description="Manually review and label leads.jsonl")
+    parser.add_argument("--assist", nargs="?", const="./checkpoints", default=None, metavar="CHECKPOINT",
+                        help="Order leads by model uncertainty and suggest labels (default checkpoint: %(const)s)")
+    parser.add_argument("--show-reviewed", action="store_true",
+                        help="Step through reviewed and deleted leads too instead of skipping them")
+    args = parser.parse_args()
+    
     root = tk.Tk()
-    app = LeadClassifierGUI(root)
+    app = LeadClassifierGUI(root, assist_checkpoint=args.assist, skip_done=not args.show_reviewed)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+from collections import OrderedDict
+
+import numpy as np
+
+INDEX_DIR = "./.cache/leads"
+HEAD_BYTES = 4096
+PREFETCH = 8
+
+
+class LeadFile:
+    """Random access to the leads of a JSONL file without parsing it up front.
+
+    A byte-offset index of line starts is built with one vectorized newline scan
+    of an mmap and cached on disk next to the size and a fingerprint of the file.
+    On reopen the cached index is reused if the file only grew, and extended by
+    scanning just the appended bytes. Leads are decoded on access, together with
+    a small window around them for smooth navigation.
+    """
+
+    def __init__(self, path, index_dir=INDEX_DIR, prefetch=PREFETCH):
+        self.path = path
+        self.prefetch = prefetch
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", os.path.abspath(path)).strip("_")
+        os.makedirs(index_dir, exist_ok=True)
+        self.index_path = os.path.join(index_dir, slug + ".offsets.npy")
+        self.meta_path = os.path.join(index_dir, slug + ".meta.json")
+        self.decoded = OrderedDict()
+        self._file = None
+        self._mm = None
+        self.starts = np.zeros(0, dtype=np.int64)
+        self.ends = np.zeros(0, dtype=np.int64)
+        self.refresh()
+
+    def _open(self):
+        self.close()
+        self._file = open(self.path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        if self._file is not None:
+            self._file.close()
+        self._mm = self._file = None
+
+    def _fingerprint(self, end):
+        """Hash of the first bytes and of the bytes before end, enough to notice a rewritten file"""
+        tail = max(0, end - HEAD_BYTES)
+        return hashlib.blake2b(self._mm[:min(HEAD_BYTES, end)] + self._mm[tail:end], digest_size=16).hexdigest()
+
+    def _scan(self, begin, end):
+        """(starts, ends) of the non-empty newline-terminated lines in [begin, end)"""
+        data = np.frombuffer(self._mm, dtype=np.uint8, count=end - begin, offset=begin) if end > begin \
+            else np.zeros(0, dtype=np.uint8)
+        ends = np.flatnonzero(data == ord("\n")).astype(np.int64) + begin
+        starts = np.concatenate(([begin], ends[:-1] + 1)) if len(ends) else ends
+        keep = ends > starts
+        return starts[keep], ends[keep]
+
+    def _load_cached(self):
+        """Cached (starts, ends, indexed_size) if they still describe a prefix of the file, else None"""
+        if not (os.path.exists(self.meta_path) and os.path.exists(self.index_path)):
+            return None
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        indexed = meta["indexed_size"]
+        if indexed > self.size or meta["fingerprint"] != self._fingerprint(indexed):
+            return None
+        bounds = np.load(self.index_path)
+        return bounds[0], bounds[1], indexed
+
+    def _save_cached(self, indexed):
+        tmp_path = self.index_path + ".tmp.npy"
+        np.save(tmp_path, np.stack([self.starts, self.ends]))
+        os.replace(tmp_path, self.index_path)
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump({"indexed_size": indexed, "fingerprint": self._fingerprint(indexed)}, f)
+
+    def refresh(self):
+        """Revalidate the index against the file on disk and index any appended lines; returns the new count"""
+        before = len(self.starts)
+        self._open()
+        cached = self._load_cached()
+        if cached is None:
+            starts, ends, indexed = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), 0
+            self.decoded.clear()
+        else:
+            starts, ends, indexed = cached
+        if indexed < self.size:
+            new_starts, new_ends = self._scan(indexed, self.size)
+            starts, ends = np.concatenate((starts, new_starts)), np.concatenate((ends, new_ends))
+            complete = int(new_ends[-1]) + 1 if len(new_ends) else indexed
+            self.starts, self.ends = starts, ends
+            if complete > indexed:
+                self._save_cached(complete)
+            # A last line without a newline is readable (but not cached) once it is a whole JSON
+            # document; while a writer is still appending it, it stays hidden until a later refresh()
+            if complete < self.size and self._complete_tail(complete):
+                self.starts = np.append(self.starts, complete)
+                self.ends = np.append(self.ends, self.size)
+        else:
+            self.starts, self.ends = starts, ends
+        if len(self.starts) < before:
+            self.decoded.clear()
+        return len(self.starts) - before
+
+    def _complete_tail(self, begin):
+        tail = self._mm[begin:self.size]
+        if not tail.strip():
+            return False
+        try:
+            json.loads(tail)
+        except ValueError:
+            return False
+        return True
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _decode(self, i):
+        return json.loads(self._mm[int(self.starts[i]):int(self.ends[i])])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        if i not in self.decoded:
+            for j in range(max(0, i - self.prefetch), min(len(self), i + self.prefetch + 1)):
+                if j not in self.decoded:
+                    self.decoded[j] = self._decode(j)
+            while len(self.decoded) > 4 * self.prefetch + 2:
+                self.decoded.popitem(last=False)
+        self.decoded.move_to_end(i)
+        return self.decoded[i]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._decode(i)
@@ -0,0 +1,127 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from embedding_store import EmbeddingStore
+from index import MAX_LENGTH, MODEL_NAME, make_embed_fn
+from label_store import lead_id
+from lead_reader import LeadFile
+from token_cache import TokenCache
+
+VECTOR_DIR = "./.cache/leads"
+
+
+class NeighbourIndex:
+    """Exact cosine nearest-neighbour search over embeddings of every lead in leads.jsonl.
+
+    Row i of vectors.f32 is the L2-normalized embedding of lead i, appended as
+    leads are added and read back through a memmap, so a query is one
+    matrix-vector product. Embeddings come through the EmbeddingStore, so a
+    rebuild after leads.jsonl is regenerated only embeds texts never seen before.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, root=VECTOR_DIR):
+        self.model_name = model_name
+        os.makedirs(root, exist_ok=True)
+        self.vectors_path = os.path.join(root, "neighbours.f32")
+        self.meta_path = os.path.join(root, "neighbours.json")
+        self.count = 0
+        self.dim = None
+        self.last_id = None  # lead_id of the last embedded lead, to notice a rewritten leads.jsonl
+        self._vectors = None
+        self._embed = None
+        if os.path.exists(self.meta_path) and os.path.exists(self.vectors_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta["model_name"] == model_name:
+                self.dim, self.last_id = meta["dim"], meta["last_id"]
+                self.count = min(meta["count"], os.path.getsize(self.vectors_path) // (4 * self.dim))
+
+    def _store(self):
+        """EmbeddingStore plus embed_fn, created on the first update that has something to embed"""
+        if self._embed is None:
+            cache = TokenCache(self.model_name, MAX_LENGTH)
+            self._embed = (EmbeddingStore(self.model_name), make_embed_fn(self.model_name, cache))
+        return self._embed
+
+    def vectors(self):
+        if self._vectors is None:
+            if self.count == 0:
+                return np.zeros((0, self.dim or 0), dtype=np.float32)
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+        return self._vectors
+
+    def covered(self, leads):
+        """How many leading leads have embeddings; 0 if the leads already indexed changed"""
+        if self.count > len(leads) or (self.count and lead_id(leads[self.count - 1]['text']) != self.last_id):
+            return 0
+        return self.count
+
+    def update(self, leads, batch_size=1024):
+        """Embed leads[self.count:]; starts over if the leads already indexed changed. Returns how many were added"""
+        self.count = self.covered(leads)
+        if self.count == len(leads):
+            return 0
+        store, embed_fn = self._store()
+        added = len(leads) - self.count
+        self._vectors = None
+        with open(self.vectors_path, 'r+b' if self.count else 'wb') as f:
+            f.truncate(self.count * 4 * (self.dim or 0))
+            f.seek(0, os.SEEK_END)
+            for start in range(self.count, len(leads), batch_size):
+                texts = [leads[i]['text'] for i in range(start, min(start + batch_size, len(leads)))]
+                vectors, _ = store.encode(texts, embed_fn)
+                self.dim = vectors.shape[1]
+                f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                f.flush()
+                self.count = start + len(texts)
+                self.last_id = lead_id(texts[-1])
+                self._save_meta()
+        return added
+
+    def _save_meta(self):
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump({"model_name": self.model_name, "dim": self.dim, "count": self.count,
+                       "last_id": self.last_id}, f)
+
+    def neighbours(self, index, k=20, keep=None):
+        """[(position, cosine similarity)] of the k leads most similar to lead index, best first.
+
+        keep(position) -> bool filters candidates (e.g. only unlabeled leads); the
+        candidate pool widens until k survivors are found or every lead was seen.
+        """
+        vectors = self.vectors()
+        if index >= len(vectors):
+            return []
+        similarities = vectors @ vectors[index]
+        similarities[index] = -np.inf
+        pool = min(len(similarities), 4 * k)
+        while True:
+            top = np.argpartition(-similarities, pool - 1)[:pool] if pool < len(similarities) else \
+                np.arange(len(similarities))
+            top = top[np.argsort(-similarities[top])]
+            found = [(int(i), float(similarities[i])) for i in top
+                     if np.isfinite(similarities[i]) and (keep is None or keep(int(i)))][:k]
+            if len(found) == k or pool >= len(similarities):
+                return found
+            pool = min(len(similarities), pool * 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the lead embedding index used for bulk labeling")
+    parser.add_argument("leads", nargs="?", default="leads.jsonl")
+    parser.add_argument("--model-name", default=MODEL_NAME)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = NeighbourIndex(args.model_name)
+    added = index.update(LeadFile(args.leads))
+    print(f"Embedded {added} new leads ({index.count} indexed, dim {index.dim}) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
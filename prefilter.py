@@ -0,0 +1,156 @@
+import argparse
+import os
+import re
+import zlib
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from checkpoints import CHECKPOINT_ROOT
+from index import DATA_FILE, DEDUP_THRESHOLD, load_splits
+
+PREFILTER_FILE = os.path.join(CHECKPOINT_ROOT, "prefilter.pt")
+NUM_BUCKETS = 1 << 18
+TOKEN_RE = re.compile(r"#?\w+")
+
+
+def hashed_features(text, num_buckets=NUM_BUCKETS):
+    """Hashed word unigrams and bigrams of the lowercased text ("for hire", "#opentowork", "hiring a", ...)"""
+    words = TOKEN_RE.findall(text.lower())
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return [zlib.crc32(gram.encode("utf-8")) % num_buckets for gram in grams] or [0]
+
+
+class HashedNgramModel(torch.nn.Module):
+    """Logistic regression over hashed n-gram counts (an EmbeddingBag with one output)"""
+
+    def __init__(self, num_buckets=NUM_BUCKETS):
+        super().__init__()
+        self.num_buckets = num_buckets
+        self.weights = torch.nn.EmbeddingBag(num_buckets, 1, mode="sum")
+        torch.nn.init.zeros_(self.weights.weight)
+        self.bias = torch.nn.Parameter(torch.zeros(1))
+        # Decision band calibrated by fit_thresholds(): p <= low -> 0, p >= high -> 1, else uncertain.
+        # float64 so a closed side (-inf / inf) or a cut just below 1.0 is stored exactly
+        self.register_buffer("thresholds", torch.tensor([-np.inf, np.inf], dtype=torch.float64))
+
+    def encode(self, texts):
+        features = [hashed_features(text, self.num_buckets) for text in texts]
+        offsets = torch.tensor([0] + [len(f) for f in features[:-1]]).cumsum(0)
+        return torch.tensor([i for f in features for i in f]), offsets
+
+    def forward(self, indices, offsets):
+        return self.weights(indices, offsets).squeeze(-1) + self.bias
+
+    def predict_proba(self, texts):
+        with torch.no_grad():
+            return torch.sigmoid(self(*self.encode(texts))).numpy()
+
+    def route(self, texts):
+        """Return (probabilities, decided mask, labels) where labels are only meaningful where decided"""
+        probs = self.predict_proba(texts)
+        low, high = self.thresholds.tolist()
+        decided = (probs <= low) | (probs >= high)
+        return probs, decided, (probs >= high).astype(int)
+
+
+def train_prefilter(texts, labels, epochs=100, lr=0.05, weight_decay=1e-4):
+    model = HashedNgramModel()
+    indices, offsets = model.encode(texts)
+    targets = torch.tensor(labels, dtype=torch.float32)
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr, weight_decay=weight_decay)
+    for _ in range(epochs):
+        optimizer.zero_grad()
+        loss = F.binary_cross_entropy_with_logits(model(indices, offsets), targets)
+        loss.backward()
+        optimizer.step()
+    return model
+
+
+def fit_thresholds(probs, labels, target_precision=0.98, min_support=10, decision_threshold=0.5):
+    """Widest decision band whose decisions on each side keep at least target_precision.
+
+    high is the lowest cut where "p >= high -> label 1" is at least target_precision precise;
+    low is the highest cut where "p <= low -> label 0" is. Either side stays closed (-inf / inf,
+    which no probability reaches, even a saturated 0.0 or 1.0) when no cut reaches the target on
+    at least min_support examples. The band always contains decision_threshold (high >= it >
+    low), so a prefilter decision never disagrees with "score >= threshold" downstream.
+    """
+    probs = np.asarray(probs)
+    labels = np.asarray(labels)
+
+    counts = np.arange(1, len(probs) + 1)
+
+    def widest_cut(order, wanted, allowed):
+        # Precision of every prefix; a cut is only valid after the last of a run of tied scores
+        ranked = probs[order]
+        precision = np.cumsum(labels[order] == wanted) / counts
+        boundary = np.append(ranked[1:] != ranked[:-1], True)
+        ok = (precision >= target_precision) & (counts >= min_support) & boundary & allowed(ranked)
+        return float(ranked[np.nonzero(ok)[0].max()]) if ok.any() else None
+
+    # Positive side ranks by descending score, negative side by ascending score
+    high = widest_cut(np.argsort(-probs, kind="stable"), 1, lambda cut: cut >= decision_threshold)
+    low = widest_cut(np.argsort(probs, kind="stable"), 0, lambda cut: cut < decision_threshold)
+    high = float("inf") if high is None else high
+    low = float("-inf") if low is None else low
+
+    if low >= high:
+        low, high = float("-inf"), float("inf")
+    return low, high
+
+
+def report(model, texts, labels, name):
+    probs, decided, preds = model.route(texts)
+    labels = np.asarray(labels)
+    positive = decided & (preds == 1)
+    negative = decided & (preds == 0)
+    pos_precision = (labels[positive] == 1).mean() if positive.any() else float("nan")
+    neg_precision = (labels[negative] == 0).mean() if negative.any() else float("nan")
+    print(f"{name}: {decided.mean():.1%} decided by the prefilter "
+          f"(label 1: {positive.sum()} at precision {pos_precision:.4f}, "
+          f"label 0: {negative.sum()} at precision {neg_precision:.4f}), "
+          f"{(~decided).sum()} sent to the transformer")
+
+
+def load_prefilter(path=PREFILTER_FILE):
+    state = torch.load(path, map_location="cpu")
+    model = HashedNgramModel(state["num_buckets"])
+    model.load_state_dict(state["model"])
+    return model.eval()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the hashed n-gram prefilter that runs before the transformer")
+    parser.add_argument("--data-file", default=DATA_FILE)
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD)
+    parser.add_argument("--target-precision", type=float, default=0.98,
+                        help="Precision each side of the prefilter must keep")
+    parser.add_argument("--calibration-fraction", type=float, default=0.25,
+                        help="Share of the train split held out to calibrate the thresholds")
+    parser.add_argument("--decision-threshold", type=float, default=0.5,
+                        help="The score_leads.py/serve.py --threshold the prefilter band must straddle")
+    parser.add_argument("--output", default=PREFILTER_FILE)
+    args = parser.parse_args()
+
+    _, train_split, test_split = load_splits(args.data_file, args.dedup_threshold)
+    fit_calib = train_split.train_test_split(test_size=args.calibration_fraction, seed=42)
+    fit_rows, calib_rows = fit_calib["train"], fit_calib["test"]
+
+    model = train_prefilter(list(fit_rows["text"]), list(fit_rows["label"]))
+    low, high = fit_thresholds(model.predict_proba(list(calib_rows["text"])), list(calib_rows["label"]),
+                               args.target_precision, decision_threshold=args.decision_threshold)
+    model.thresholds = torch.tensor([low, high], dtype=torch.float64)
+    print(f"Thresholds: label 0 if p <= {low:.4f}, label 1 if p >= {high:.4f}")
+
+    report(model, list(calib_rows["text"]), list(calib_rows["label"]), "Calibration split")
+    report(model, list(test_split["text"]), list(test_split["label"]), "Test split")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    torch.save({"model": model.state_dict(), "num_buckets": model.num_buckets}, args.output)
+    print(f"Saved prefilter to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from label_store import LabelStore, lead_id, pack_ids, unpack_ids
+from lead_reader import LeadFile
+from review_journal import JOURNAL_FILE, ReviewJournal
+from search_index import SearchIndex
+
+LEADS_FILE = "leads.jsonl"
+TRUE_FILE = "classified_leads.jsonl"
+FALSE_FILE = "nonleads.jsonl"
+SESSION_FILE = "classifier_session.json"
+CACHE_DIR = os.path.join(".cache", "leads")  # Lead offsets, search index and neighbour embeddings
+
+
+class ReviewEngine:
+    """Review session state and actions, with no UI.
+
+    Holds the leads being reviewed, the cursor, labels, reviewed/deleted ids
+    and the persistence around them (journal, compaction, session restore),
+    plus the optional search view, model-assisted queue and neighbour index.
+    Navigation methods return False instead of showing a message, so the Tk
+    GUI, scripts and benchmarks drive exactly the same code.
+    """
+
+    def __init__(self, leads=None, root=".", skip_done=True):
+        self.root = root
+        self.skip_done = skip_done  # next() passes over reviewed/deleted leads
+        self.cache_dir = self.path(CACHE_DIR)
+        self.leads = LeadFile(self.path(LEADS_FILE), index_dir=self.cache_dir) if leads is None else leads
+        self.current_index = 0
+        self.labels = LabelStore()  # Classified leads (label 1 = job, 0 = not a job), keyed by content hash
+        self.deleted_ids = set()  # Deleted/removed leads (by lead_id)
+        self.reviewed_ids = set()  # Leads that have been reviewed (by lead_id)
+        self.visited_ids = set()  # Leads displayed by this engine, which next() never skips
+
+        # Autosaves append label events here; compaction rewrites the JSONL files
+        self.journal = ReviewJournal(self.path(JOURNAL_FILE))
+        self.compact_every = 5000  # Journal events before an autosave compacts
+        self.saved_index = None  # current_index as of the last journal flush
+        self.current_id = None  # lead_id at current_index as of the last journal flush
+
+        # Model-assisted mode: next() follows an uncertainty-ordered queue scored in the background
+        self.review_queue = None
+        self.session_start = time.monotonic()
+        self.session_labeled = 0  # Classifications made since the engine was created
+
+        # Nearest-neighbour bulk labeling: the embedding index (built by neighbour_index.py) is opened on first use
+        self.neighbour_index = None
+
+        # Search: the inverted index is loaded on first use; results form a filtered view for navigation
+        self.search_index = None
+        self.max_unindexed = 5000  # Leads search() will index itself; more need `python search_index.py`
+        self.search_results = None  # Sorted lead positions, or None when not filtering
+        self.search_pos = 0
+        self.search_query = ""
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    # Current lead
+
+    def has_lead(self):
+        return 0 <= self.current_index < len(self.leads)
+
+    def current_lead(self):
+        return self.leads[self.current_index]
+
+    def view(self):
+        """Mark the current lead as reviewed by viewing it (unless it's deleted).
+
+        Returns (lead, deleted, was_new) for displaying it.
+        """
+        lead = self.current_lead()
+        key = lead_id(lead['text'])
+        deleted = key in self.deleted_ids
+        was_new = key not in self.reviewed_ids
+        self.visited_ids.add(key)
+        if not deleted:
+            self.mark_reviewed(key)
+        return lead, deleted, was_new
+
+    def progress(self):
+        """(reviewed, deleted, remaining) counts"""
+        reviewed = len(self.reviewed_ids)
+        deleted = len(self.deleted_ids)
+        return reviewed, deleted, max(0, len(self.leads) - reviewed - deleted)
+
+    def labels_per_hour(self):
+        hours = (time.monotonic() - self.session_start) / 3600
+        return self.session_labeled / hours if hours > 0 else 0.0
+
+    def is_done(self, index):
+        key = lead_id(self.leads[index]['text'])
+        return key in self.reviewed_ids or key in self.deleted_ids
+
+    def skipped(self, index):
+        """Whether next() passes over lead index: reviewed or deleted, but not in this session"""
+        key = lead_id(self.leads[index]['text'])
+        return (key in self.reviewed_ids or key in self.deleted_ids) and key not in self.visited_ids
+
+    def is_unlabeled(self, key):
+        return key not in self.labels and key not in self.deleted_ids
+
+    # Actions
+
+    def classify(self, label):
+        """Label the current lead (moving it out of the other label if needed) and advance"""
+        if not self.has_lead():
+            return False
+        self.label_lead(self.current_index, label)
+        return self.next()
+
+    def label_lead(self, index, label):
+        lead = self.leads[index]
+        key = self.labels.set_label(lead, label)
+        self.journal.record('label', id=key, label=label, lead=lead)
+        self.mark_reviewed(key)
+        self.session_labeled += 1
+
+    def delete(self):
+        """Delete the current lead: it is dropped from both exports and from the reviewed set"""
+        if not self.has_lead():
+            return False
+        key = lead_id(self.current_lead()['text'])
+        self.deleted_ids.add(key)
+        self.reviewed_ids.discard(key)
+        self.labels.remove(key)
+        self.journal.record('delete', id=key)
+        return True
+
+    def mark_reviewed(self, key):
+        if key not in self.reviewed_ids:
+            self.reviewed_ids.add(key)
+            self.journal.record('review', id=key)
+
+    # Navigation
+
+    def previous(self):
+        """Go to the previous lead (previous search result while filtering); False at the start"""
+        if self.search_results is not None:
+            return self.step_search(-1)
+        if self.current_index > 0:
+            self.current_index -= 1
+            return True
+        return False
+
+    def next(self):
+        """Go to the next lead (next search result while filtering, else the most uncertain scored
+        lead in model-assisted mode); False at the end.
+
+        With skip_done, leads reviewed or deleted in an earlier session are passed over, so a
+        regenerated or reordered leads.jsonl only shows what is left. Leads already shown in this
+        session are not skipped, so going back and forth works; previous() and jump() reach all.
+        """
+        if self.search_results is not None:
+            return self.step_search(1)
+        queued = self.review_queue.pop() if self.review_queue else None
+        if queued is not None:
+            self.current_index = queued
+            return True
+        index = self.current_index + 1
+        while True:
+            while index < len(self.leads):
+                if not (self.skip_done and self.skipped(index)):
+                    self.current_index = index
+                    return True
+                index += 1
+            # leads.jsonl may have been appended to since it was opened
+            if not (isinstance(self.leads, LeadFile) and self.leads.refresh() > 0):
+                return False
+
+    def jump(self, number):
+        """Go to lead number (1-based); raises ValueError when out of range"""
+        if not 1 <= number <= len(self.leads):
+            raise ValueError(f"Lead number must be between 1 and {len(self.leads)}")
+        self.current_index = number - 1
+
+    # Search
+
+    def label_filter(self, field, value, positions):
+        """Search filters on review state: label:job|notjob|unlabeled|reviewed|unreviewed|deleted.
+
+        Works on the lead_ids stored in the search index, so no lead is decoded.
+        """
+        if field != 'label':
+            raise ValueError(f"Unknown search filter {field}:{value}")
+        states = {
+            'job': lambda: ([key for key, lead in self.labels.leads.items() if lead['label'] == 1], False),
+            'notjob': lambda: ([key for key, lead in self.labels.leads.items() if lead['label'] == 0], False),
+            'unlabeled': lambda: (list(self.labels.leads) + list(self.deleted_ids), True),
+            'reviewed': lambda: (self.reviewed_ids, False),
+            'unreviewed': lambda: (list(self.reviewed_ids) + list(self.deleted_ids), True),
+            'deleted': lambda: (self.deleted_ids, False),
+        }
+        if value not in states:
+            raise ValueError(f"label: must be one of {', '.join(states)}")
+        keys, invert = states[value]()
+        wanted = np.fromiter((int(key, 16) for key in keys), dtype=np.uint64, count=len(keys))
+        positions = np.asarray(positions, dtype=np.uint32)
+        return positions[np.isin(self.search_index.ids[positions], wanted, invert=invert)]
+
+    def search(self, query):
+        """Restrict navigation to the leads matching query and go to the first; returns the match count.
+
+        Leads appended since `python search_index.py` last ran are indexed first, unless there are
+        more than max_unindexed of them (raises RuntimeError: indexing them would freeze the GUI).
+        """
+        if self.search_index is None or len(self.leads) - self.search_index.count > self.max_unindexed:
+            # (Re)open to pick up a build made since the index was first loaded
+            self.search_index = SearchIndex(os.path.join(self.cache_dir, "search_index.pkl"))
+        unindexed = len(self.leads) - self.search_index.covered(self.leads)
+        if unindexed > self.max_unindexed:
+            raise RuntimeError(f"{unindexed} leads are not in the search index yet; "
+                               f"run `python search_index.py` to update it")
+        self.search_index.update(self.leads)
+        results = self.search_index.search(query, self.leads, keep=self.label_filter)
+        if results:
+            self.search_query = query
+            self.search_results = results
+            self.search_pos = 0
+            self.current_index = results[0]
+        return len(results)
+
+    def clear_search(self):
+        self.search_results = None
+        self.search_query = ""
+
+    def step_search(self, step):
+        """Move through the filtered view; returns False at either end"""
+        pos = self.search_pos + step
+        if not 0 <= pos < len(self.search_results):
+            return False
+        self.search_pos = pos
+        self.current_index = self.search_results[pos]
+        return True
+
+    # Model assistance
+
+    def start_review_queue(self, checkpoint):
+        """Score upcoming leads with the trained classifier in a background process"""
+        # Imported here so plain reviewing doesn't need torch
+        from review_queue import ReviewQueue
+        self.review_queue = ReviewQueue(self.leads, self.is_done, checkpoint)
+
+    def suggestion(self):
+        """(suggested label, probability of label 1) for the current lead, or None"""
+        return self.review_queue.suggestion(self.current_index) if self.review_queue else None
+
+    def similar(self, k=20):
+        """[(position, similarity)] of the k nearest unlabeled neighbours of the current lead.
+
+        Only searches the embeddings built by `python neighbour_index.py` (embedding on the
+        UI thread would freeze the GUI); raises RuntimeError if the current lead isn't in them.
+        Leads appended after the last build are left out until the next one.
+        """
+        # Imported here so plain reviewing doesn't need torch
+        from neighbour_index import NeighbourIndex
+        if self.neighbour_index is None or self.neighbour_index.covered(self.leads) <= self.current_index:
+            # Reopen to pick up a build made since the index was first loaded
+            self.neighbour_index = NeighbourIndex(root=self.cache_dir)
+        covered = self.neighbour_index.covered(self.leads)
+        if covered <= self.current_index:
+            raise RuntimeError(f"{len(self.leads) - covered} leads, including this one, are not embedded yet; "
+                               f"run `python neighbour_index.py` to update the index")
+        return self.neighbour_index.neighbours(
+            self.current_index, k, keep=lambda i: self.is_unlabeled(lead_id(self.leads[i]['text'])))
+
+    def close(self):
+        if self.review_queue:
+            self.review_queue.close()
+
+    # Persistence
+
+    def record_cursor(self):
+        if self.current_index != self.saved_index and self.has_lead():
+            self.current_id = lead_id(self.current_lead()['text'])
+            self.journal.record('cursor', index=self.current_index, id=self.current_id)
+            self.saved_index = self.current_index
+
+    def autosave(self):
+        """Append events since the last save to the journal; compact once it has grown large"""
+        self.record_cursor()
+        self.journal.flush()
+        if self.journal.size >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Atomically rewrite the JSONL exports and session file from memory and empty the journal"""
+        self.record_cursor()
+
+        # Lead ids are stored as sorted packed 8-byte arrays (base64), not JSON int lists
+        session_data = {
+            'version': 2,
+            'current_index': self.current_index,
+            'current_id': self.current_id,
+            'reviewed_ids': pack_ids(self.reviewed_ids),
+            'deleted_ids': pack_ids(self.deleted_ids),
+            'true_count': self.labels.counts[1],
+            'false_count': self.labels.counts[0]
+        }
+        self.journal.compact({
+            self.path(TRUE_FILE): self.labels.jsonl_lines(1),
+            self.path(FALSE_FILE): self.labels.jsonl_lines(0),
+            self.path(SESSION_FILE): [json.dumps(session_data)],
+        })
+
+    def load_session(self):
+        """Restore the last compacted session and replay the journal on top of it.
+
+        Returns the number of journaled events replayed, or None if there was no session.
+        """
+        # Anything recorded in memory but not yet autosaved is replayed along with the rest
+        self.journal.flush()
+        self.read_session()
+        replayed = self.replay_journal()
+        if not replayed and not os.path.exists(self.path(SESSION_FILE)):
+            return None
+        self.resume_position()
+        return replayed
+
+    def read_session(self):
+        """Restore position, reviewed/deleted ids and labels from the last compacted session files"""
+        if not os.path.exists(self.path(SESSION_FILE)):
+            return
+        with open(self.path(SESSION_FILE), 'r', encoding='utf-8') as f:
+            session_data = json.load(f)
+
+        self.current_index = session_data.get('current_index', 0)
+        self.current_id = session_data.get('current_id')
+        if 'reviewed_ids' in session_data:
+            self.reviewed_ids = unpack_ids(session_data['reviewed_ids'])
+            self.deleted_ids = unpack_ids(session_data['deleted_ids'])
+        else:
+            # Version 1 sessions stored positions in leads.jsonl; map them through the current file
+            self.reviewed_ids = self.ids_at(session_data.get('reviewed_indices', []))
+            self.deleted_ids = self.ids_at(session_data.get('deleted_leads', []))
+
+        # Load previously classified leads
+        self.load_labels()
+
+    def ids_at(self, indices):
+        return {lead_id(self.leads[i]['text']) for i in indices if 0 <= i < len(self.leads)}
+
+    def load_labels(self):
+        """Rebuild the label store from the classified_leads.jsonl / nonleads.jsonl exports"""
+        self.labels = LabelStore()
+        if os.path.exists(self.path(TRUE_FILE)):
+            self.labels.load_jsonl(self.path(TRUE_FILE), 1)
+        if os.path.exists(self.path(FALSE_FILE)):
+            self.labels.load_jsonl(self.path(FALSE_FILE), 0)
+
+    def apply_event(self, event):
+        """Redo one journaled review event on the in-memory session"""
+        op = event['op']
+        if op == 'label':
+            self.labels.set_label(event['lead'], event['label'], key=event['id'])
+        elif op == 'review':
+            self.reviewed_ids.add(event['id'])
+        elif op == 'delete':
+            self.deleted_ids.add(event['id'])
+            self.reviewed_ids.discard(event['id'])
+            self.labels.remove(event['id'])
+        elif op == 'cursor':
+            self.current_index = event['index']
+            self.current_id = event.get('id')
+
+    def replay_journal(self):
+        """Apply events autosaved after the last compaction (e.g. before a crash)"""
+        replayed = 0
+        for event in self.journal.replay():
+            self.apply_event(event)
+            replayed += 1
+        self.saved_index = self.current_index
+        return replayed
+
+    def resume_position(self):
+        """Keep current_index if it still holds the lead the session was on; otherwise (leads.jsonl was
+        regenerated or reordered) move to the first lead that is neither reviewed nor deleted"""
+        if self.has_lead() and (self.current_id is None or lead_id(self.current_lead()['text']) == self.current_id):
+            return
+        done = self.reviewed_ids | self.deleted_ids
+        self.current_index = 0
+        for i in range(len(self.leads)):
+            if lead_id(self.leads[i]['text']) not in done:
+                self.current_index = i
+                break
+        self.saved_index = None
@@ -0,0 +1,78 @@
+import json
+import os
+
+JOURNAL_FILE = "classifier_session.journal"
+
+
+def atomic_write(path, lines):
+    """Write lines to path through a fsynced temp file and rename, so readers see the old or new file, never half"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for line in lines:
+            f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ReviewJournal:
+    """Append-only log of review events between compactions.
+
+    record() only buffers an event; flush() appends everything buffered with a
+    single write and fsync, so an autosave costs O(new events) however large the
+    session is. Events are idempotent, so replaying a journal that was already
+    compacted into the exports (a crash between the two steps) is harmless.
+    """
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.pending = []
+        self.size = 0  # Events on disk since the last compaction
+
+    def record(self, op, **fields):
+        self.pending.append({"op": op, **fields})
+
+    def flush(self):
+        if not self.pending:
+            return 0
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("".join(json.dumps(event, separators=(",", ":")) + "\n" for event in self.pending))
+            f.flush()
+            os.fsync(f.fileno())
+        flushed = len(self.pending)
+        self.size += flushed
+        self.pending = []
+        return flushed
+
+    def replay(self):
+        """Yield the events on disk; a torn final line from a crash mid-append is dropped.
+
+        The journal is truncated back to the last whole event, so later appends
+        don't land after the torn fragment where no replay would reach them.
+        """
+        self.size = 0
+        if not os.path.exists(self.path):
+            return
+        good = 0  # Byte offset just past the last whole event
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break
+                good += len(line)
+                self.size += 1
+                yield event
+        if good < os.path.getsize(self.path):
+            os.truncate(self.path, good)
+
+    def compact(self, outputs):
+        """Atomically rewrite each {path: lines} snapshot, then start an empty journal"""
+        self.flush()
+        for path, lines in outputs.items():
+            atomic_write(path, lines)
+        # Only now is it safe to drop the events the snapshot contains
+        atomic_write(self.path, [])
+        self.size = 0
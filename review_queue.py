@@ -0,0 +1,88 @@
+import heapq
+import multiprocessing as mp
+import os
+import queue
+
+from checkpoints import CHECKPOINT_ROOT, resolve_checkpoint
+from index import MAX_LENGTH
+from score_leads import init_worker, score_texts
+
+
+class ReviewQueue:
+    """Uncertainty-ordered review queue scored ahead of the reviewer in a background process.
+
+    Chunks of upcoming, not yet reviewed leads are sent to a single spawned
+    scoring worker; its results arrive on a pool callback thread and are only
+    merged into the queue by poll(), which the Tk main loop calls, so the UI
+    thread never waits on the model. pop() hands out the scored lead whose
+    label-1 probability is closest to 0.5.
+    """
+
+    def __init__(self, leads, is_done, checkpoint=CHECKPOINT_ROOT, chunk_size=32, lookahead=512,
+                 threads=None, int8=False, prefilter=None):
+        self.leads = leads
+        self.is_done = is_done
+        self.chunk_size = chunk_size
+        self.lookahead = lookahead
+        self.scores = {}
+        self.heap = []
+        self.next_unscored = 0
+        self.in_flight = 0
+        self._results = queue.Queue()
+        threads = threads or max(1, (os.cpu_count() or 2) // 2)
+        self.pool = mp.get_context("spawn").Pool(
+            1, initializer=init_worker,
+            initargs=(resolve_checkpoint(checkpoint), threads, MAX_LENGTH, int8, prefilter))
+        self.fill()
+
+    def fill(self):
+        """Submit chunks until the lookahead window of unreviewed scored-or-scoring leads is full"""
+        while self.in_flight < 2 and len(self.heap) + self.in_flight * self.chunk_size < self.lookahead \
+                and self.next_unscored < len(self.leads):
+            indices = []
+            while len(indices) < self.chunk_size and self.next_unscored < len(self.leads):
+                if not self.is_done(self.next_unscored):
+                    indices.append(self.next_unscored)
+                self.next_unscored += 1
+            if not indices:
+                continue
+            texts = [self.leads[i]['text'] for i in indices]
+            self.in_flight += 1
+            self.pool.apply_async(score_texts, (texts,),
+                                  callback=lambda result, indices=indices: self._results.put((indices, result[0])),
+                                  error_callback=lambda error: self._results.put((None, error)))
+
+    def poll(self):
+        """Merge finished chunks into the queue and top it up; returns how many leads got scored"""
+        merged = 0
+        while True:
+            try:
+                indices, scores = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self.in_flight -= 1
+            if indices is None:
+                print(f"Review queue scoring error: {scores}")
+                continue
+            for i, score in zip(indices, scores):
+                self.scores[i] = score
+                heapq.heappush(self.heap, (abs(score - 0.5), i))
+            merged += len(indices)
+        self.fill()
+        return merged
+
+    def pop(self):
+        """Index of the most uncertain scored lead that is still unreviewed, or None if none is ready"""
+        while self.heap:
+            _, i = heapq.heappop(self.heap)
+            if not self.is_done(i):
+                return i
+        return None
+
+    def suggestion(self, index):
+        """(suggested label, probability of label 1) for a scored lead, or None"""
+        score = self.scores.get(index)
+        return None if score is None else (int(score >= 0.5), score)
+
+    def close(self):
+        self.pool.terminate()
@@ -0,0 +1,146 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+
+import torch
+from transformers import AutoTokenizer
+
+from checkpoints import CHECKPOINT_ROOT, resolve_checkpoint
+from export_model import load_quantized
+from prefilter import PREFILTER_FILE, load_prefilter
+from index import MAX_LENGTH, load_classifier
+
+# Per-worker model state, filled in by init_worker
+_worker = {}
+
+
+def init_worker(checkpoint, threads, max_length, int8=False, prefilter=None):
+    """Load the checkpoint once per worker process with a fixed torch thread budget"""
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    _worker["tokenizer"] = AutoTokenizer.from_pretrained(checkpoint)
+    if int8:
+        _worker["model"] = load_quantized(checkpoint).eval()
+    else:
+        _worker["model"] = load_classifier(checkpoint).eval()
+    _worker["max_length"] = max_length
+    _worker["prefilter"] = load_prefilter(prefilter) if prefilter else None
+
+
+def score_texts(texts, batch_size=64):
+    """Return the label-1 probability of every text in input order, how many skipped the transformer, and
+    the prefilter's label for each text it decided (None for the rest)"""
+    tokenizer = _worker["tokenizer"]
+    model = _worker["model"]
+    scores = [0.0] * len(texts)
+    decided_labels = [None] * len(texts)
+
+    # Let the prefilter settle the confident cases; only the uncertain band reaches the transformer
+    remaining = list(range(len(texts)))
+    if _worker["prefilter"] is not None:
+        probs, decided, labels = _worker["prefilter"].route(texts)
+        for i in decided.nonzero()[0].tolist():
+            scores[i] = float(probs[i])
+            decided_labels[i] = int(labels[i])
+        remaining = (~decided).nonzero()[0].tolist()
+    skipped = len(texts) - len(remaining)
+    if not remaining:
+        return scores, skipped, decided_labels
+
+    encoded = dict(zip(remaining, tokenizer([texts[i] for i in remaining], truncation=True,
+                                            max_length=_worker["max_length"])["input_ids"]))
+
+    # Score in length order to keep padding small, then restore input order
+    order = sorted(remaining, key=lambda i: len(encoded[i]))
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            batch = tokenizer.pad([{"input_ids": encoded[i]} for i in rows], padding="longest", return_tensors="pt")
+            logits = model(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"]).logits
+            for i, score in zip(rows, torch.softmax(logits, dim=-1)[:, 1].tolist()):
+                scores[i] = score
+    return scores, skipped, decided_labels
+
+
+def read_chunks(path, chunk_size):
+    """Lazily yield lists of lead texts from a JSONL file"""
+    chunk = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            chunk.append(json.loads(line)["text"])
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_args():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Score a leads JSONL file with a trained checkpoint")
+    parser.add_argument("input", nargs="?", default="leads.jsonl")
+    parser.add_argument("output", nargs="?", default="scored_leads.jsonl")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_ROOT,
+                        help="Checkpoint directory, or a checkpoint root to use its latest version")
+    parser.add_argument("--workers", type=int, default=cpus)
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="torch intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Leads sent to a worker at a time")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--int8", action="store_true",
+                        help="Use the int8 model written by export_model.py instead of fp32")
+    parser.add_argument("--prefilter", nargs="?", const=PREFILTER_FILE, default=None,
+                        help="Decide confident leads with the n-gram prefilter (default path: %(const)s)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    checkpoint = resolve_checkpoint(args.checkpoint)
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+    print(f"Scoring {args.input} with {checkpoint} on {args.workers} workers x {threads} threads")
+
+    start = time.perf_counter()
+    scored = 0
+    skipped = 0
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(args.workers, initializer=init_worker,
+                  initargs=(checkpoint, threads, MAX_LENGTH, args.int8, args.prefilter)) as pool, \
+            open(args.output, 'w', encoding='utf-8') as out:
+        # Keep a bounded window of chunks in flight and write them back in input order
+        pending = deque()
+
+        def write_oldest():
+            nonlocal skipped
+            texts, result = pending.popleft()
+            scores, chunk_skipped, decided_labels = result.get()
+            skipped += chunk_skipped
+            for text, score, label in zip(texts, scores, decided_labels):
+                # A prefilter decision stands even if its calibrated band doesn't straddle --threshold
+                label = int(score >= args.threshold) if label is None else label
+                out.write(json.dumps({"text": text, "score": score, "label": label}) + '\n')
+            out.flush()
+            return len(texts)
+
+        for texts in read_chunks(args.input, args.chunk_size):
+            pending.append((texts, pool.apply_async(score_texts, (texts, args.batch_size))))
+            if len(pending) >= 2 * args.workers:
+                scored += write_oldest()
+        while pending:
+            scored += write_oldest()
+
+    elapsed = time.perf_counter() - start
+    print(f"Scored {scored} leads in {elapsed:.1f}s ({scored / elapsed:.1f} leads/sec) → {args.output}")
+    if args.prefilter:
+        print(f"Prefilter decided {skipped} leads ({skipped / max(scored, 1):.1%}) without the transformer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import argparse
+import os
+import pickle
+import re
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from label_store import lead_id
+from lead_reader import LeadFile
+
+INDEX_FILE = "./.cache/leads/search_index.pkl"
+WORD_RE = re.compile(r"\w+")
+PLATFORM_RE = re.compile(r"^\s*\[([A-Za-z]+)\]")
+QUERY_RE = re.compile(r'-?"[^"]*"?|\S+')
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.lower())
+
+
+def terms(text):
+    """Distinct words and adjacent word pairs of a text, as indexed"""
+    words = tokenize(text)
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def platform_of(text):
+    """Platform tag a lead starts with ("[REDDIT] ...") lowercased, or None"""
+    match = PLATFORM_RE.match(text)
+    return match.group(1).lower() if match else None
+
+
+class SearchIndex:
+    """Inverted index from lowercased words, word pairs and "platform:<name>" to sorted lead positions.
+
+    Postings are numpy uint32 arrays so boolean queries are sorted-array
+    intersections/unions. Positions are not stored: a two-word phrase is a
+    word-pair lookup, and longer phrases intersect their pairs and then check
+    the texts of the candidates left after every other condition. ids holds
+    the lead_id of every position as a uint64, so filters on review state
+    never decode leads. update() only tokenizes leads appended since the last
+    call and rebuilds from scratch when the leads before them changed.
+    """
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.postings = {}
+        self.ids = np.zeros(0, dtype=np.uint64)
+        self.count = 0
+        self.last_id = None  # lead_id of the last indexed lead, to notice a rewritten leads.jsonl
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+            # Indexes saved before ids were stored are rebuilt
+            if "ids" in state:
+                self.postings, self.ids = state["postings"], state["ids"]
+                self.count, self.last_id = state["count"], state["last_id"]
+
+    def covered(self, leads):
+        """How many leading leads are indexed; 0 if the leads already indexed changed"""
+        if self.count > len(leads) or (self.count and lead_id(leads[self.count - 1]['text']) != self.last_id):
+            return 0
+        return self.count
+
+    def update(self, leads):
+        """Index leads[self.count:]; returns how many leads were added"""
+        if self.covered(leads) == 0:
+            self.postings, self.ids, self.count = {}, np.zeros(0, dtype=np.uint64), 0
+        if self.count == len(leads):
+            return 0
+        added = defaultdict(list)
+        ids = []
+        for i in range(self.count, len(leads)):
+            text = leads[i]['text']
+            ids.append(int(lead_id(text), 16))
+            for term in terms(text):
+                added[term].append(i)
+            platform = platform_of(text)
+            if platform:
+                added["platform:" + platform].append(i)
+        for term, docs in added.items():
+            new = np.asarray(docs, dtype=np.uint32)
+            self.postings[term] = np.concatenate((self.postings[term], new)) if term in self.postings else new
+        self.ids = np.concatenate((self.ids, np.asarray(ids, dtype=np.uint64)))
+        indexed = len(leads) - self.count
+        self.count = len(leads)
+        self.last_id = lead_id(leads[self.count - 1]['text'])
+        self.save()
+        return indexed
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({"postings": self.postings, "ids": self.ids, "count": self.count, "last_id": self.last_id},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def _docs(self, term):
+        return self.postings.get(term, np.zeros(0, dtype=np.uint32))
+
+    def _match(self, atom):
+        """Sorted positions matching one word, platform:<name> or phrase, and the phrase words
+        still to be checked against the text (phrases longer than a word pair), if any"""
+        if atom.lower().startswith("platform:"):
+            return self._docs(atom.lower()), None
+        words = tokenize(atom)
+        if len(words) <= 2:
+            return self._docs(" ".join(words)), None
+        docs = self._docs(f"{words[0]} {words[1]}")
+        for a, b in zip(words[1:], words[2:]):
+            docs = np.intersect1d(docs, self._docs(f"{a} {b}"), assume_unique=True)
+        return docs, f" {' '.join(words)} "
+
+    def search(self, query, leads, keep=None):
+        """Sorted lead positions matching query.
+
+        Terms are ANDed, OR separates alternatives, a leading - negates a term,
+        "quoted words" must appear as a phrase and platform:<name> filters on the
+        [PLATFORM] prefix. Any other field:value term is passed to keep(field,
+        value, positions), which gets a uint32 array and returns the subset to
+        keep (label filters); -field:value keeps the rest instead.
+        """
+        everything = None
+        results = np.zeros(0, dtype=np.uint32)
+        for clause in split_or(QUERY_RE.findall(query)):
+            docs = None
+            excluded = []
+            filters = []
+            phrases = []
+            for atom in clause:
+                negate = atom.startswith("-") and len(atom) > 1
+                atom = atom[1:] if negate else atom
+                quoted = atom.startswith('"')
+                atom = atom.strip('"')
+                field, _, value = atom.partition(":")
+                if value and not quoted and field.lower() != "platform":
+                    filters.append((field.lower(), value.lower(), negate))
+                    continue
+                matched, phrase = self._match(atom)
+                if negate:
+                    excluded.append((matched, phrase))
+                    continue
+                if phrase:
+                    phrases.append(phrase)
+                docs = matched if docs is None else np.intersect1d(docs, matched, assume_unique=True)
+            if docs is None:
+                if everything is None:
+                    everything = np.arange(self.count, dtype=np.uint32)
+                docs = everything
+            for matched, phrase in excluded:
+                if phrase:
+                    # Only exclude candidates that really contain the phrase
+                    matched = np.asarray(self._verify(matched, [phrase], leads), dtype=np.uint32)
+                docs = np.setdiff1d(docs, matched, assume_unique=True)
+            for field, value, negate in filters:
+                kept = np.asarray(keep(field, value, docs) if keep else [], dtype=np.uint32)
+                docs = np.setdiff1d(docs, kept, assume_unique=True) if negate else kept
+            if phrases:
+                docs = np.asarray(self._verify(docs, phrases, leads), dtype=np.uint32)
+            results = np.union1d(results, docs) if len(results) else docs
+        return results.tolist()
+
+    @staticmethod
+    def _verify(docs, phrases, leads):
+        keep = []
+        for i in docs.tolist():
+            words = f" {' '.join(tokenize(leads[i]['text']))} "
+            if all(phrase in words for phrase in phrases):
+                keep.append(i)
+        return keep
+
+
+def split_or(atoms):
+    clauses = [[]]
+    for atom in atoms:
+        if atom == "OR":
+            clauses.append([])
+        else:
+            clauses[-1].append(atom)
+    return [clause for clause in clauses if clause]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the search index used by the review GUI")
+    parser.add_argument("leads", nargs="?", default="leads.jsonl")
+    parser.add_argument("--index", default=INDEX_FILE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = SearchIndex(args.index)
+    added = index.update(LeadFile(args.leads))
+    print(f"Indexed {added} new leads ({index.count} indexed, {len(index.postings)} terms) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from collections import Counter, OrderedDict, deque
+
+# Everything is loaded from the local checkpoint; never reach out to the hub
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+from checkpoints import CHECKPOINT_ROOT, resolve_checkpoint
+from index import MAX_LENGTH
+from score_leads import init_worker, score_texts
+
+
+def normalize_text(text):
+    """Cache key for a lead: case- and whitespace-insensitive"""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class LRUCache:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = OrderedDict()
+
+    def get(self, key):
+        if key not in self.items:
+            return None
+        self.items.move_to_end(key)
+        return self.items[key]
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+
+class MicroBatcher:
+    """Gather concurrent requests into one model call of up to max_batch texts.
+
+    A batch is dispatched as soon as it is full or max_wait seconds after its
+    first request arrived, whichever comes first. The model runs in a worker
+    thread so the event loop keeps accepting requests meanwhile.
+    """
+
+    def __init__(self, score_fn, max_batch=32, max_wait=0.01):
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.batch_sizes = Counter()
+
+    async def submit(self, text):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self.batch_sizes[len(batch)] += 1
+            texts = [text for text, _ in batch]
+            try:
+                scores = await loop.run_in_executor(None, self.score_fn, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), score in zip(batch, scores):
+                if not future.done():
+                    future.set_result(score)
+
+
+class ClassifierService:
+    def __init__(self, batcher, cache_size=10000, threshold=0.5, latency_window=10000):
+        self.batcher = batcher
+        self.cache = LRUCache(cache_size)
+        self.threshold = threshold
+        self.latencies = deque(maxlen=latency_window)
+        self.requests = 0
+        self.cache_hits = 0
+
+    async def classify(self, text):
+        start = time.perf_counter()
+        self.requests += 1
+        key = normalize_text(text)
+        score = self.cache.get(key)
+        cached = score is not None
+        if cached:
+            self.cache_hits += 1
+        else:
+            score = await self.batcher.submit(text)
+            self.cache.put(key, score)
+        self.latencies.append(time.perf_counter() - start)
+        return {"text": text, "score": score, "label": int(score >= self.threshold), "cached": cached}
+
+    def metrics(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return 1000 * latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "cache_size": len(self.cache.items),
+            "latency_ms": {"p50": percentile(50), "p90": percentile(90), "p99": percentile(99)},
+            "batch_size_histogram": dict(sorted(self.batcher.batch_sizes.items())),
+        }
+
+
+async def read_request(reader):
+    """Parse one HTTP/1.1 request; returns (method, path, headers, body) or None on EOF"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return method, path, headers, body
+
+
+def write_response(writer, status, payload, keep_alive):
+    reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+    body = json.dumps(payload).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {reasons[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+
+
+async def handle_connection(service, reader, writer):
+    try:
+        while True:
+            request = await read_request(reader)
+            if request is None:
+                break
+            method, path, headers, body = request
+            keep_alive = headers.get("connection", "keep-alive").lower() != "close"
+
+            if method == "POST" and path == "/classify":
+                try:
+                    payload = json.loads(body)
+                    if "texts" in payload:
+                        results = await asyncio.gather(*(service.classify(text) for text in payload["texts"]))
+                        write_response(writer, 200, {"results": results}, keep_alive)
+                    else:
+                        write_response(writer, 200, await service.classify(payload["text"]), keep_alive)
+                except (ValueError, KeyError, TypeError) as e:
+                    write_response(writer, 400, {"error": f"Expected {{\"text\": ...}}: {e}"}, keep_alive)
+                except Exception as e:
+                    write_response(writer, 500, {"error": str(e)}, keep_alive)
+            elif method == "GET" and path == "/metrics":
+                write_response(writer, 200, service.metrics(), keep_alive)
+            elif method == "GET" and path == "/health":
+                write_response(writer, 200, {"status": "ok"}, keep_alive)
+            else:
+                write_response(writer, 404, {"error": f"No route for {method} {path}"}, keep_alive)
+
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(args):
+    checkpoint = resolve_checkpoint(args.checkpoint)
+    init_worker(checkpoint, args.threads, MAX_LENGTH, args.int8)
+    batcher = MicroBatcher(lambda texts: score_texts(texts, args.max_batch)[0], args.max_batch, args.max_wait_ms / 1000)
+    service = ClassifierService(batcher, cache_size=args.cache_size, threshold=args.threshold)
+
+    batch_task = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), args.host, args.port)
+    print(f"Serving {checkpoint} on http://{args.host}:{args.port} "
+          f"(max batch {args.max_batch}, max wait {args.max_wait_ms}ms)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_task.cancel()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local micro-batching HTTP service for the lead classifier")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_ROOT)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--int8", action="store_true",
+                        help="Use the int8 model written by export_model.py instead of fp32")
+    return parser.parse_args()
+
+
+def main():
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
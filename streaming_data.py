@@ -0,0 +1,100 @@
+import glob
+import hashlib
+import json
+import random
+
+import torch
+from torch.utils.data import IterableDataset, get_worker_info
+from transformers import AutoTokenizer
+
+
+def expand_paths(patterns):
+    """Resolve JSONL shard paths/globs in a stable order"""
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    return paths
+
+
+def split_of(text, test_fraction=0.2):
+    """Deterministic train/test assignment from a hash of the text, stable as the corpus grows"""
+    bucket = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+    return "test" if bucket < test_fraction * 2 ** 64 else "train"
+
+
+def iter_rows(paths, worker_id=0, num_workers=1):
+    """Lazily yield rows from JSONL shards; each worker takes every num_workers-th line"""
+    line_no = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line_no += 1
+                if (line_no - 1) % num_workers != worker_id:
+                    continue
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def shuffle_buffer(items, size, rng):
+    """Approximate shuffle holding at most size items in memory"""
+    buffer = []
+    for item in items:
+        if len(buffer) < size:
+            buffer.append(item)
+            continue
+        idx = rng.randrange(size)
+        yield buffer[idx]
+        buffer[idx] = item
+    rng.shuffle(buffer)
+    yield from buffer
+
+
+class StreamingLeadDataset(IterableDataset):
+    """Tokenized examples streamed from JSONL shards without materializing the corpus.
+
+    Rows are routed to a split by split_of(), shuffled through a bounded buffer and
+    tokenized inside the DataLoader worker that reads them, so memory use depends on
+    shuffle_size and prefetching only, never on corpus size.
+    """
+
+    def __init__(self, paths, tokenizer_name, split="train", test_fraction=0.2, max_length=512,
+                 shuffle_size=10000, tokenize_batch=256):
+        self.paths = expand_paths(paths)
+        self.tokenizer_name = tokenizer_name
+        self.split = split
+        self.test_fraction = test_fraction
+        self.max_length = max_length
+        self.shuffle_size = shuffle_size if split == "train" else 0
+        self.tokenize_batch = tokenize_batch
+
+    def __iter__(self):
+        worker = get_worker_info()
+        if worker is None:
+            worker_id, num_workers = 0, 1
+            # Draw from the torch RNG so every epoch gets a new (but seeded) order
+            seed = int(torch.randint(0, 2 ** 31, ()).item())
+        else:
+            worker_id, num_workers, seed = worker.id, worker.num_workers, worker.seed
+
+        tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+        rows = (row for row in iter_rows(self.paths, worker_id, num_workers)
+                if split_of(row["text"], self.test_fraction) == self.split)
+        if self.shuffle_size:
+            rows = shuffle_buffer(rows, self.shuffle_size, random.Random(seed))
+
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.tokenize_batch:
+                yield from self._tokenize(tokenizer, chunk)
+                chunk = []
+        if chunk:
+            yield from self._tokenize(tokenizer, chunk)
+
+    def _tokenize(self, tokenizer, rows):
+        encoded = tokenizer([row["text"] for row in rows], truncation=True, max_length=self.max_length)
+        for row, ids in zip(rows, encoded["input_ids"]):
+            yield {"input_ids": ids, "attention_mask": [1] * len(ids), "label": int(row["label"])}
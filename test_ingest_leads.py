@@ -0,0 +1,99 @@
+import io
+import json
+
+import pytest
+
+from ingest_leads import Ingester, iter_json_array, read_collection, read_export
+
+
+def lead(_id, content):
+    return {"_id": _id, "platform": "linkedin", "content": content}
+
+
+def ingest_twice(tmp_path, collection, first, second):
+    output, state = str(tmp_path / "leads.jsonl"), str(tmp_path / "ingest_state.json")
+    counts = []
+    for docs in (first, second):
+        collection.insert_many(docs)
+        # A fresh Ingester per run, so the mark goes through the state file
+        ingester = Ingester(output, state)
+        counts.append(ingester.ingest(read_collection(collection, ingester.high_water_mark), batch_size=2,
+                                      ordered=True))
+    with open(output, 'r', encoding='utf-8') as f:
+        return counts, [json.loads(line)["text"] for line in f]
+
+
+@pytest.mark.parametrize("ids", [[1, 2, 5, 9, 10, 11], [f"lead-{i:02}" for i in (1, 2, 5, 9, 10, 11)]])
+def test_read_collection_resumes_after_high_water_mark(tmp_path, ids):
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient().db.leads
+    first = [lead(_id, f"post {_id}") for _id in ids[:3]]
+    second = [lead(_id, f"post {_id}") for _id in ids[3:]]
+    counts, texts = ingest_twice(tmp_path, collection, first, second)
+    assert counts == [(3, 0), (3, 0)]
+    assert texts == [f"[LINKEDIN] post {_id}" for _id in ids]
+
+
+def test_read_collection_object_ids(tmp_path):
+    mongomock = pytest.importorskip("mongomock")
+    from bson import ObjectId
+    collection = mongomock.MongoClient().db.leads
+    ids = sorted(ObjectId() for _ in range(4))
+    counts, texts = ingest_twice(tmp_path, collection, [lead(ids[0], "a"), lead(ids[1], "")],
+                                 [lead(ids[2], "c"), lead(ids[3], "d")])
+    assert counts == [(1, 1), (2, 0)]
+    assert texts == ["[LINKEDIN] a", "[LINKEDIN] c", "[LINKEDIN] d"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1 << 16])
+def test_iter_json_array_small_chunks(chunk_size):
+    docs = [lead({"$oid": f"{i:024x}"}, f'post {i} with "quotes", [brackets] and {{braces}} é') for i in range(5)]
+    text = " \n[\n" + ",\n".join(json.dumps(doc, ensure_ascii=False) for doc in docs) + "\n]\n"
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == docs
+
+
+@pytest.mark.parametrize("text", ["[]", " [ ] "])
+def test_iter_json_array_empty(text):
+    assert list(iter_json_array(io.StringIO(text), 1)) == []
+
+
+def test_iter_json_array_truncated():
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[{"_id": 1}, {"_id": 2'), 4))
+
+
+def test_export_resumes_after_high_water_mark(tmp_path):
+    export = tmp_path / "leads.json"
+    output, state = str(tmp_path / "leads.jsonl"), str(tmp_path / "ingest_state.json")
+    export.write_text(json.dumps([lead(1, "a"), lead(2, "b")]), encoding='utf-8')
+    assert Ingester(output, state).ingest(read_export(str(export))) == (2, 0)
+    export.write_text(json.dumps([lead(1, "a"), lead(2, "b"), lead(10, "c")]), encoding='utf-8')
+    assert Ingester(output, state).ingest(read_export(str(export))) == (1, 0)
+
+
+def test_export_out_of_id_order(tmp_path):
+    export = tmp_path / "leads.json"
+    output, state = str(tmp_path / "leads.jsonl"), str(tmp_path / "ingest_state.json")
+    ids = [1, 5, 2, 6, 3, 7]
+    export.write_text(json.dumps([lead(_id, f"post {_id}") for _id in ids]), encoding='utf-8')
+    assert Ingester(output, state).ingest(read_export(str(export)), batch_size=2) == (6, 0)
+    with open(output, 'r', encoding='utf-8') as f:
+        assert [json.loads(line)["text"] for line in f] == [f"[LINKEDIN] post {_id}" for _id in ids]
+    ingester = Ingester(output, state)
+    assert ingester.high_water_mark == 7
+    assert ingester.ingest(read_export(str(export))) == (0, 0)
+
+
+def test_crash_in_unordered_run_is_rolled_back(tmp_path):
+    output, state = str(tmp_path / "leads.jsonl"), str(tmp_path / "ingest_state.json")
+    docs = [lead(_id, f"post {_id}") for _id in [1, 5, 2, 6, 3, 7]]
+
+    def crashing():
+        yield from docs[:5]
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        Ingester(output, state).ingest(crashing(), batch_size=2)
+    assert Ingester(output, state).ingest(iter(docs), batch_size=2) == (6, 0)
+    with open(output, 'r', encoding='utf-8') as f:
+        assert len(f.readlines()) == 6
@@ -0,0 +1,43 @@
+from review_engine import ReviewEngine
+
+LEADS = [{"text": f"[LINKEDIN] lead {i}"} for i in range(6)]
+
+
+def reopen(root):
+    engine = ReviewEngine(leads=LEADS, root=str(root))
+    engine.load_session()
+    return engine
+
+
+def label(engine, indices):
+    for i in indices:
+        engine.label_lead(i, i % 2)
+    engine.autosave()
+
+
+def test_recovers_after_torn_journal_line(tmp_path):
+    label(reopen(tmp_path), [0, 1])
+    # A crash in the middle of an append
+    with open(tmp_path / "classifier_session.journal", "a", encoding="utf-8") as f:
+        f.write('{"op":"label","id":"ab')
+
+    engine = reopen(tmp_path)
+    assert engine.labels.counts == {0: 1, 1: 1}
+    label(engine, [2, 3])
+
+    engine = reopen(tmp_path)
+    assert engine.labels.counts == {0: 2, 1: 2}
+    assert [engine.labels.label_of(engine.ids_at([i]).pop()) for i in range(4)] == [0, 1, 0, 1]
+
+
+def test_recovers_after_compaction(tmp_path):
+    engine = reopen(tmp_path)
+    label(engine, [0, 1, 2])
+    engine.compact()
+    label(engine, [3])
+    engine.delete()  # Lead 0
+    engine.autosave()
+
+    engine = reopen(tmp_path)
+    assert engine.labels.counts == {0: 1, 1: 2}
+    assert engine.is_done(0) and not engine.is_done(4)
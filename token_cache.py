@@ -0,0 +1,119 @@
+import hashlib
+import os
+import re
+
+import numpy as np
+from transformers import AutoTokenizer
+
+CACHE_DIR = "./.cache/tokens"
+TOKEN_DTYPE = np.int32
+
+# One fixed-size record per cached text: hash of the text -> slice of ids.bin
+INDEX_DTYPE = np.dtype([("key", "S16"), ("offset", "<i8"), ("length", "<i4")])
+
+
+def text_key(text):
+    """Content hash used to address a text in the cache"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class TokenCache:
+    """Content-addressed on-disk cache of token ids for one tokenizer/max_length pair.
+
+    Token ids are appended unpadded to ids.bin and read back through a memmap;
+    index.bin maps each text hash to its (offset, length). Attention masks are
+    all ones over the stored length, so they are rebuilt rather than stored.
+    """
+
+    def __init__(self, tokenizer_name, max_length, cache_dir=CACHE_DIR):
+        self.tokenizer_name = tokenizer_name
+        self.max_length = max_length
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", tokenizer_name).strip("_")
+        self.root = os.path.join(cache_dir, f"{slug}-{max_length}")
+        self.ids_path = os.path.join(self.root, "ids.bin")
+        self.index_path = os.path.join(self.root, "index.bin")
+        self.tokenizer_path = os.path.join(self.root, "tokenizer")
+        os.makedirs(self.root, exist_ok=True)
+
+        self.tokenizer = None
+        self.index = {}
+        self._ids = None
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path) and not os.path.exists(self.ids_path):
+            return
+        ids_size = os.path.getsize(self.ids_path) // TOKEN_DTYPE().itemsize if os.path.exists(self.ids_path) else 0
+        data = b""
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                data = f.read()
+        # Whole records only: a torn record would misalign every one appended after it
+        records = np.frombuffer(data, dtype=INDEX_DTYPE, count=len(data) // INDEX_DTYPE.itemsize)
+        # Records are appended in offset order, so those whose ids never made it to disk (interrupted run) are
+        # a suffix; keep the prefix before the first one
+        dangling = np.flatnonzero(records["offset"] + records["length"] > ids_size)
+        count = int(dangling[0]) if len(dangling) else len(records)
+        records = records[:count]
+        for key, offset, length in zip(records["key"].tolist(), records["offset"].tolist(), records["length"].tolist()):
+            # numpy strips trailing NUL bytes from fixed-size byte strings
+            self.index[key.ljust(16, b"\0")] = (offset, length)
+        # Drop the tail of an interrupted write (including a partial token) so the memmap opens and new
+        # records stay aligned with their ids
+        used = int((records["offset"] + records["length"]).max()) if count else 0
+        if os.path.exists(self.index_path):
+            os.truncate(self.index_path, count * INDEX_DTYPE.itemsize)
+        if os.path.exists(self.ids_path):
+            os.truncate(self.ids_path, used * TOKEN_DTYPE().itemsize)
+
+    def _ids_view(self):
+        if self._ids is None:
+            if not os.path.exists(self.ids_path) or os.path.getsize(self.ids_path) == 0:
+                return np.zeros(0, dtype=TOKEN_DTYPE)
+            self._ids = np.memmap(self.ids_path, dtype=TOKEN_DTYPE, mode="r")
+        return self._ids
+
+    def load_tokenizer(self):
+        """Load the tokenizer, keeping a local copy so warm starts skip the hub"""
+        if self.tokenizer is None:
+            if os.path.isdir(self.tokenizer_path):
+                self.tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_path)
+            else:
+                self.tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+                self.tokenizer.save_pretrained(self.tokenizer_path)
+        return self.tokenizer
+
+    def encode(self, texts, batch_size=1000):
+        """Return an (offset, length) slice for every text, tokenizing only unseen texts.
+
+        The second return value is the number of texts that had to be tokenized.
+        """
+        keys = [text_key(text) for text in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self.index and key not in missing:
+                missing[key] = text
+
+        if missing:
+            tokenizer = self.load_tokenizer()
+            offset = len(self._ids_view())
+            pending = list(missing.items())
+            with open(self.ids_path, "ab") as ids_file, open(self.index_path, "ab") as index_file:
+                for start in range(0, len(pending), batch_size):
+                    chunk = pending[start:start + batch_size]
+                    encoded = tokenizer([text for _, text in chunk], truncation=True, max_length=self.max_length)
+                    records = np.zeros(len(chunk), dtype=INDEX_DTYPE)
+                    for i, ((key, _), ids) in enumerate(zip(chunk, encoded["input_ids"])):
+                        ids_file.write(np.asarray(ids, dtype=TOKEN_DTYPE).tobytes())
+                        records[i] = (key, offset, len(ids))
+                        self.index[key] = (offset, len(ids))
+                        offset += len(ids)
+                    # Ids first, then the index, so a crash never leaves dangling records
+                    ids_file.flush()
+                    index_file.write(records.tobytes())
+            self._ids = None
+
+        return [self.index[key] for key in keys], len(missing)
+
+    def get(self, offset, length):
+        return self._ids_view()[offset:offset + length]